@@ -0,0 +1,297 @@
+"""
+브라우저 정적 리소스 공유 캐시
+- Playwright context.route 로 JS/CSS/폰트 요청을 가로채서 로컬 디스크에서 바로 응답
+- 본문은 sha256 이름으로 한 번만 저장 (scraped_data/asset_cache/blobs/ab/abcd...)
+- URL → (해시, 검증자 ETag/Last-Modified, 만료 시각) 인덱스는 SQLite — 워커 프로세스 여러 개가 같이 쓴다
+- 불변 리소스(immutable, max-age 하루 이상, 파일명에 해시)는 네트워크 없이 응답,
+  그 외는 조건부 요청으로 재검증해서 304 면 캐시 본문 사용
+- 전체 크기가 max_bytes 를 넘으면 가장 오래 안 쓴 것부터 삭제 (LRU)
+  (크기 합계는 프로세스마다 누적해 두고, 한도를 넘었을 때만 DB 에서 다시 센다)
+- async 쪽은 SQLite/파일/해시 작업을 asyncio.to_thread 로 돌려서 이벤트 루프를 막지 않는다
+"""
+import asyncio, hashlib, json, os, re, sqlite3, threading, time
+
+CACHE_DIR = "scraped_data/asset_cache"
+MAX_BYTES = 512 * 1024 * 1024
+
+CACHE_RESOURCE_TYPES = {"script", "stylesheet", "font"}
+IMMUTABLE_MIN_AGE = 24 * 3600
+FINGERPRINT_RE = re.compile(r'[.\-_][0-9a-f]{8,}\.(?:js|css|woff2?|ttf)(?:$|\?)|[?&](?:v|ver|version)=')
+
+# 다시 응답할 때 살려둘 헤더
+KEEP_HEADERS = ("content-type", "access-control-allow-origin", "cache-control", "etag", "last-modified")
+
+
+def parse_max_age(cache_control):
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else None
+
+
+class AssetCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        self.total_bytes = None  # 항목 크기 합계 (다른 프로세스가 쓴 만큼은 evict 때 맞춘다)
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0, "bytes_fetched": 0}
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def db(self):
+        """프로세스마다 따로 연결 (fork 한 연결은 못 쓴다)"""
+        if self.conn is None or self.pid != os.getpid():
+            self.conn = sqlite3.connect(os.path.join(self.cache_dir, "index.db"), timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    immutable INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries (last_access)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self.conn.commit()
+            self.pid = os.getpid()
+            self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self.conn
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256[:2], sha256)
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.db().execute(
+                "SELECT sha256, size, headers, immutable, expires_at FROM entries WHERE url=?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        sha256, size, headers, immutable, expires_at = row
+        try:
+            with open(self.blob_path(sha256), "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        return {"body": body, "size": size, "headers": json.loads(headers),
+                "immutable": bool(immutable), "expires_at": expires_at}
+
+    def touch(self, url, expires_at=None):
+        with self.lock:
+            conn = self.db()
+            if expires_at is None:
+                conn.execute("UPDATE entries SET last_access=? WHERE url=?", (time.time(), url))
+            else:
+                conn.execute("UPDATE entries SET last_access=?, expires_at=? WHERE url=?", (time.time(), expires_at, url))
+            conn.commit()
+
+    def freshness(self, url, headers):
+        """(불변 여부, 만료 시각)"""
+        cache_control = headers.get("cache-control", "")
+        max_age = parse_max_age(cache_control) or 0
+        immutable = ("immutable" in cache_control or max_age >= IMMUTABLE_MIN_AGE
+                     or bool(FINGERPRINT_RE.search(url)))
+        return immutable, time.time() + max_age
+
+    def store(self, url, body, headers):
+        if "no-store" in headers.get("cache-control", ""):
+            return
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+        kept = {k: v for k, v in headers.items() if k in KEEP_HEADERS}
+        immutable, expires_at = self.freshness(url, headers)
+        with self.lock:
+            conn = self.db()
+            old = conn.execute("SELECT size FROM entries WHERE url=?", (url,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (url, sha256, size, headers, immutable, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, sha256, len(body), json.dumps(kept), int(immutable), expires_at, time.time())
+            )
+            conn.commit()
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            over = self.total_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """전체 크기가 한도를 넘으면 LRU 순서로 삭제, 아무도 안 가리키는 blob 파일도 삭제"""
+        with self.lock:
+            conn = self.db()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self.total_bytes = total
+            if total <= self.max_bytes:
+                return
+            removed = []
+            for url, sha256, size in conn.execute("SELECT url, sha256, size FROM entries ORDER BY last_access ASC").fetchall():
+                if total <= self.max_bytes * 0.9:
+                    break
+                conn.execute("DELETE FROM entries WHERE url=?", (url,))
+                removed.append(sha256)
+                total -= size
+            conn.commit()
+            self.total_bytes = total
+            for sha256 in set(removed):
+                if not conn.execute("SELECT 1 FROM entries WHERE sha256=? LIMIT 1", (sha256,)).fetchone():
+                    try:
+                        os.remove(self.blob_path(sha256))
+                    except OSError:
+                        pass
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def flush_stats(self):
+        """이번 프로세스 통계를 공유 통계에 더하고 초기화"""
+        with self.lock:
+            conn = self.db()
+            for name, value in self.stats.items():
+                conn.execute(
+                    "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, value)
+                )
+            conn.commit()
+            self.stats = {name: 0 for name in self.stats}
+
+    def total_stats(self):
+        with self.lock:
+            return dict(self.db().execute("SELECT name, value FROM stats").fetchall())
+
+    def summary(self):
+        s = self.stats
+        requests = s["hits"] + s["revalidated"] + s["misses"]
+        if not requests:
+            return "캐시 대상 요청 없음"
+        return (f"적중 {s['hits']} / 재검증 {s['revalidated']} / 미스 {s['misses']} "
+                f"(적중률 {(s['hits'] + s['revalidated']) / requests:.0%}), "
+                f"절약 {s['bytes_saved'] / 1024:.0f}KB, 다운로드 {s['bytes_fetched'] / 1024:.0f}KB")
+
+    # --- route 처리 (sync / async 공통 판단 로직) ---
+
+    def plan(self, request):
+        """캐시 대상이면 (url, 캐시 항목 또는 None), 아니면 None"""
+        if request.method != "GET" or request.resource_type not in CACHE_RESOURCE_TYPES:
+            return None
+        return request.url, self.lookup(request.url)
+
+    def revalidation_headers(self, request, entry):
+        headers = dict(request.headers)
+        if entry["headers"].get("etag"):
+            headers["if-none-match"] = entry["headers"]["etag"]
+        if entry["headers"].get("last-modified"):
+            headers["if-modified-since"] = entry["headers"]["last-modified"]
+        return headers
+
+    def fulfill_args(self, entry):
+        return {"status": 200, "headers": entry["headers"], "body": entry["body"]}
+
+
+_caches = {}
+
+
+def get_asset_cache(cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    """프로세스 안에서는 같은 캐시 객체 재사용"""
+    if cache_dir not in _caches:
+        _caches[cache_dir] = AssetCache(cache_dir, max_bytes)
+    return _caches[cache_dir]
+
+
+def install_asset_cache(context, cache=None):
+    """sync Playwright BrowserContext 에 캐시 route 등록"""
+    cache = cache or get_asset_cache()
+
+    def handle(route):
+        try:
+            planned = cache.plan(route.request)
+            if planned is None:
+                return route.continue_()
+            url, entry = planned
+            if entry and (entry["immutable"] or entry["expires_at"] > time.time()):
+                cache.touch(url)
+                cache.count("hits")
+                cache.count("bytes_saved", entry["size"])
+                return route.fulfill(**cache.fulfill_args(entry))
+
+            headers = cache.revalidation_headers(route.request, entry) if entry else None
+            response = route.fetch(headers=headers)
+            if entry and response.status == 304:
+                cache.touch(url, cache.freshness(url, response.headers)[1])
+                cache.count("revalidated")
+                cache.count("bytes_saved", entry["size"])
+                return route.fulfill(**cache.fulfill_args(entry))
+
+            body = response.body()
+            cache.count("misses")
+            cache.count("bytes_fetched", len(body))
+            if response.status == 200:
+                cache.store(url, body, response.headers)
+            return route.fulfill(response=response, body=body)
+        except Exception:
+            # 캐시 문제로 페이지가 깨지면 안 되니 그냥 네트워크로
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    context.route("**/*", handle)
+    return cache
+
+
+async def install_asset_cache_async(context, cache=None):
+    """async Playwright BrowserContext 에 캐시 route 등록"""
+    cache = cache or get_asset_cache()
+
+    async def handle(route):
+        try:
+            planned = await asyncio.to_thread(cache.plan, route.request)
+            if planned is None:
+                return await route.continue_()
+            url, entry = planned
+            if entry and (entry["immutable"] or entry["expires_at"] > time.time()):
+                await asyncio.to_thread(cache.touch, url)
+                cache.count("hits")
+                cache.count("bytes_saved", entry["size"])
+                return await route.fulfill(**cache.fulfill_args(entry))
+
+            headers = cache.revalidation_headers(route.request, entry) if entry else None
+            response = await route.fetch(headers=headers)
+            if entry and response.status == 304:
+                await asyncio.to_thread(cache.touch, url, cache.freshness(url, response.headers)[1])
+                cache.count("revalidated")
+                cache.count("bytes_saved", entry["size"])
+                return await route.fulfill(**cache.fulfill_args(entry))
+
+            body = await response.body()
+            cache.count("misses")
+            cache.count("bytes_fetched", len(body))
+            if response.status == 200:
+                await asyncio.to_thread(cache.store, url, body, response.headers)
+            return await route.fulfill(response=response, body=body)
+        except Exception:
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    await context.route("**/*", handle)
+    return cache
+
+
+if __name__ == "__main__":
+    cache = get_asset_cache()
+    with cache.lock:
+        count, size = cache.db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    print(f"📦 캐시 항목 {count}개, {size / 1024 / 1024:.1f}MB / {cache.max_bytes / 1024 / 1024:.0f}MB")
+    print(f"📊 누적 통계: {cache.total_stats()}")
@@ -0,0 +1,213 @@
+import os, json, random, re, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from string import Template
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+
+# 매물 ID는 실제 사이트처럼 5자리 이상
+FIRST_HOUSE_ID = 10000001
+
+
+class FixtureState:
+    """벤치마크용 가짜 사이트 설정 + 전송량 집계"""
+
+    def __init__(self, listings=100, page_size=20, photos_per_listing=5, photo_bytes=40000,
+                 latency_ms=0, jitter_ms=0, error_rate=0.0, seed=42, shared_photo_rate=0.0, buildings=5):
+        self.listings = listings
+        self.page_size = page_size
+        self.photos_per_listing = photos_per_listing
+        self.photo_bytes = photo_bytes
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        # 이 비율의 매물은 URL 은 달라도 건물 buildings 개 중 하나의 같은 사진을 쓴다 (중개사 사진 재사용)
+        self.shared_photo_rate = shared_photo_rate
+        self.buildings = buildings
+        self.random = random.Random(seed)
+
+        with open(os.path.join(FIXTURE_DIR, "detail.html"), encoding="utf-8") as f:
+            self.detail_template = Template(f.read())
+        with open(os.path.join(FIXTURE_DIR, "list.html"), encoding="utf-8") as f:
+            self.list_template = Template(f.read())
+
+        self.lock = threading.Lock()
+        self.bytes_sent = {}
+        self.requests = {}
+        self.errors = 0
+
+    def house_ids(self):
+        return [FIRST_HOUSE_ID + i for i in range(self.listings)]
+
+    def record(self, kind, size):
+        with self.lock:
+            self.bytes_sent[kind] = self.bytes_sent.get(kind, 0) + size
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            with self.lock:
+                jitter = self.random.uniform(0, self.jitter_ms)
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def photo_seed(self, house_id, order):
+        if (house_id * 2654435761) % 1000 < self.shared_photo_rate * 1000:
+            return f"building{house_id % self.buildings}_{order}".encode()
+        return f"{house_id}_{order}".encode()
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(self.bytes_sent.values())
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    /onetworoom          → 무한 스크롤 리스트 페이지
+    /api/list?page=N     → 스크롤 시 추가되는 매물 ID (JSON)
+    /house/<id>          → 매물 상세 페이지
+    /photo/<id>_<n>.jpg  → 매물 사진
+    """
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        state = self.state
+        state.delay()
+
+        path, _, query = self.path.partition("?")
+
+        if path == "/onetworoom":
+            return self.send_list_page()
+        if path == "/api/list":
+            match = re.search(r"page=(\d+)", query)
+            return self.send_list_api(int(match.group(1)) if match else 1)
+
+        match = re.fullmatch(r"/house/(\d+)/?", path)
+        if match:
+            return self.send_detail(int(match.group(1)))
+
+        match = re.fullmatch(r"/photo/(\d+)_(\d+)\.jpg", path)
+        if match:
+            return self.send_photo(int(match.group(1)), int(match.group(2)))
+
+        self.send_body(404, "text/plain", b"not found", "other")
+
+    def send_body(self, status, content_type, body, kind):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.record(kind, len(body))
+
+    def send_error_page(self, kind):
+        with self.state.lock:
+            self.state.errors += 1
+        self.send_body(503, "text/plain", b"service unavailable", kind)
+
+    def send_list_page(self):
+        state = self.state
+        first_page = state.house_ids()[:state.page_size]
+        items = "\n".join(
+            f'        <div class="a-house" data-hidx="{hidx}">매물 {hidx}</div>' for hidx in first_page
+        )
+        body = state.list_template.substitute(items=items).encode("utf-8")
+        self.send_body(200, "text/html; charset=utf-8", body, "list")
+
+    def send_list_api(self, page):
+        state = self.state
+        ids = state.house_ids()
+        start = page * state.page_size
+        chunk = ids[start:start + state.page_size]
+        next_page = page + 1 if start + state.page_size < len(ids) else -1
+        body = json.dumps({"items": chunk, "next": next_page}).encode("utf-8")
+        self.send_body(200, "application/json", body, "list")
+
+    def send_detail(self, house_id):
+        state = self.state
+        if house_id not in range(FIRST_HOUSE_ID, FIRST_HOUSE_ID + state.listings):
+            return self.send_body(404, "text/plain", b"not found", "detail")
+        if state.should_fail():
+            return self.send_error_page("detail")
+
+        # 매물 ID로 값을 정해서 매번 같은 페이지가 나오게 한다
+        n = house_id - FIRST_HOUSE_ID
+        host = self.headers.get("Host")
+        photos = "\n".join(
+            f'        <div class="carousel-item"><img class="photo" src="http://{host}/photo/{house_id}_{i}.jpg"></div>'
+            for i in range(1, state.photos_per_listing + 1)
+        )
+        # 관리비 칸은 실제 사이트처럼 <div> 여러 줄인 경우도 섞는다 (빠른 경로/브라우저 텍스트 비교용)
+        fee = 5 + n % 7
+        management_fee = [
+            f"{fee}만원",
+            f"<div>관리비 합계</div><div>정액 관리비 {fee}만원</div>",
+            f"<div>관리비 확인 불가</div><div>미등기 건물 {fee}만원</div>",
+        ][n % 3]
+        body = state.detail_template.substitute(
+            house_id=house_id,
+            latitude=f"{37.50 + (n % 100) * 0.001:.6f}",
+            longitude=f"{126.90 + (n % 97) * 0.001:.6f}",
+            deposit=100 + (n % 20) * 50,
+            rent=40 + n % 30,
+            management_fee=management_fee,
+            area=f"{18 + (n % 15) * 1.5:.2f}",
+            floor=1 + n % 5,
+            photos=photos,
+        ).encode("utf-8")
+        self.send_body(200, "text/html; charset=utf-8", body, "detail")
+
+    def send_photo(self, house_id, order):
+        state = self.state
+        if state.should_fail():
+            return self.send_error_page("photo")
+        # JPEG 헤더 + 채움 바이트 (내용은 상관없고 크기만 맞춘다)
+        seed = state.photo_seed(house_id, order)
+        body = b"\xff\xd8\xff\xe0" + (seed * (state.photo_bytes // len(seed) + 1))[:state.photo_bytes - 6] + b"\xff\xd9"
+        self.send_body(200, "image/jpeg", body, "photo")
+
+
+class FixtureServer:
+    """로컬 스레드에서 가짜 peterpanz 사이트를 띄운다"""
+
+    def __init__(self, state, host="127.0.0.1", port=0):
+        handler = type("BoundFixtureHandler", (FixtureHandler,), {"state": state})
+        self.state = state
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    state = FixtureState()
+    server = FixtureServer(state, port=8765).start()
+    print(f"✅ 픽스처 서버 실행 중: {server.base_url}/onetworoom")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,180 @@
+"""
+유사 매물 검색 벤치마크
+- 가짜 매물 N건(기본 20만)으로 SimilarIndex 를 만들고 top_k 지연시간 p50/p95 측정
+- --sql 을 주면 같은 데이터를 DB 임시 테이블에 넣고, 매 요청마다 거리식을
+  ORDER BY ... LIMIT k 로 계산하는 단순 SQL 방식과 비교 (옵션 비트셋은 SQL 쪽에선 생략)
+
+예) python bench_similar.py --rooms 200000 --queries 200
+    python bench_similar.py --rooms 200000 --queries 20 --sql --db-name bangu_bench
+"""
+import argparse, json, time
+
+import numpy as np
+import pymysql
+
+from similar_index import SimilarIndex, FEATURES, KM_PER_DEG_LAT, LOCATION_SCALE_KM, parse_floor
+
+OPTIONS = ["에어컨", "냉장고", "세탁기", "가스레인지", "인덕션", "전자레인지", "침대", "책상",
+           "옷장", "신발장", "붙박이장", "TV", "비데", "현관보안", "CCTV", "엘리베이터", "주차", "베란다"]
+TRANSACTION_TYPES = ["월세", "전세", "단기임대"]
+BENCH_TABLE = "room_similar_bench"
+
+
+def synthetic_rooms(n, seed=42):
+    """서울 서남권 근처에 흩어진 가짜 매물 dict 리스트"""
+    rng = np.random.default_rng(seed)
+    tx = rng.choice(len(TRANSACTION_TYPES), n, p=[0.7, 0.25, 0.05])
+    deposit = np.where(tx == 1, rng.lognormal(9.8, 0.5, n), rng.lognormal(7.0, 0.8, n)).round()
+    rent = np.where(tx == 1, 0, rng.lognormal(3.9, 0.4, n)).round()
+    fee = rng.choice([0, 3, 5, 7, 10, 15], n)
+    area = rng.lognormal(3.2, 0.4, n).round(2)
+    floor = rng.integers(1, 16, n)
+    lat = 37.50 + rng.normal(0, 0.03, n)
+    lon = 126.90 + rng.normal(0, 0.04, n)
+    option_mask = rng.random((n, len(OPTIONS))) < 0.35
+
+    rows = []
+    for i in range(n):
+        rows.append({
+            "id": i + 1,
+            "transaction_type": TRANSACTION_TYPES[tx[i]],
+            "deposit": int(deposit[i]),
+            "rent": int(rent[i]),
+            "management_fee": int(fee[i]),
+            "exclusive_area": float(area[i]),
+            "floor_info": "반지하/4층" if floor[i] == 1 and i % 7 == 0 else f"{floor[i]}층/{floor[i] + 3}층",
+            "latitude": float(lat[i]),
+            "longitude": float(lon[i]),
+            "additional_options": ", ".join(o for o, on in zip(OPTIONS, option_mask[i]) if on),
+        })
+    return rows
+
+
+def time_index(index, query_ids, k, radius_km):
+    samples = []
+    for room_id in query_ids:
+        started = time.perf_counter()
+        index.top_k(int(room_id), k=k, radius_km=radius_km)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def naive_sql(index):
+    """인덱스와 같은 스케일/가중치로 거리를 매 행마다 계산하는 SELECT"""
+    def scaled(column, j):
+        use_log, weight = FEATURES[j][1], FEATURES[j][2]
+        value = f"LN(1 + GREATEST({column}, 0))" if use_log else column
+        return f"COALESCE(({value} - {index.center[j]!r}) / {index.scale[j]!r}, 0) * {weight}"
+
+    terms = [f"POW({scaled('r.' + col, j)} - {scaled('q.q_' + col, j)}, 2)" for j, (col, _, _) in enumerate(FEATURES)]
+    km_lon = KM_PER_DEG_LAT * np.cos(np.radians(index.origin[0]))
+    terms.append(f"POW((r.latitude - q.q_latitude) * {KM_PER_DEG_LAT} / {LOCATION_SCALE_KM}, 2)")
+    terms.append(f"POW((r.longitude - q.q_longitude) * {km_lon!r} / {LOCATION_SCALE_KM}, 2)")
+
+    q_columns = ", ".join(f"{c} AS q_{c}" for c in
+                          ["transaction_type", "deposit", "rent", "management_fee", "exclusive_area", "floor", "latitude", "longitude"])
+    return (
+        f"SELECT r.id, SQRT({' + '.join(terms)}) AS distance "
+        f"FROM {BENCH_TABLE} r JOIN (SELECT {q_columns} FROM {BENCH_TABLE} WHERE id = %s) q "
+        f"ON r.transaction_type = q.q_transaction_type "
+        f"WHERE r.id <> %s ORDER BY distance LIMIT %s"
+    )
+
+
+def load_bench_table(db_config, rows):
+    """층은 미리 숫자로 바꿔서 넣는다 (SQL 에 문자열 파싱까지 시키진 않음)"""
+    conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    cursor.execute(
+        f"CREATE TABLE {BENCH_TABLE} (id INT PRIMARY KEY, transaction_type VARCHAR(10), deposit INT, rent INT, "
+        f"management_fee INT, exclusive_area FLOAT, floor FLOAT, latitude DOUBLE, longitude DOUBLE, "
+        f"INDEX idx_tx (transaction_type)) DEFAULT CHARSET=utf8mb4"
+    )
+    values = [(r["id"], r["transaction_type"], r["deposit"], r["rent"], r["management_fee"], r["exclusive_area"],
+               parse_floor(r["floor_info"]), r["latitude"], r["longitude"]) for r in rows]
+    for start in range(0, len(values), 5000):
+        cursor.executemany(f"INSERT INTO {BENCH_TABLE} VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                           values[start:start + 5000])
+        conn.commit()
+    return conn
+
+
+def summarize(samples):
+    ms = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="유사 매물 인덱스 vs 단순 SQL 벤치마크")
+    parser.add_argument("--rooms", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=2.0, help="공간 prefilter 측정용 반경")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sql", action="store_true", help="단순 SQL 방식도 측정 (DB 필요)")
+    parser.add_argument("--db-host", default="localhost")
+    parser.add_argument("--db-port", type=int, default=3310)
+    parser.add_argument("--db-user", default="root")
+    parser.add_argument("--db-password", default="1234")
+    parser.add_argument("--db-name", default="bangu_bench")
+    args = parser.parse_args()
+
+    rows = synthetic_rooms(args.rooms, args.seed)
+    started = time.perf_counter()
+    index = SimilarIndex()
+    index.fit(rows)
+    build_sec = time.perf_counter() - started
+
+    rng = np.random.default_rng(args.seed + 1)
+    query_ids = rng.choice(index.ids, args.queries, replace=False)
+
+    started = time.perf_counter()
+    index.upsert(rows[:1000])
+    update_sec = time.perf_counter() - started
+
+    report = {
+        "rooms": len(index),
+        "build_sec": round(build_sec, 3),
+        "update_1000_sec": round(update_sec, 3),
+        "index_mb": round((index.matrix.nbytes + index.bits.nbytes + index.ids.nbytes
+                           + index.lat.nbytes + index.lon.nbytes + index.tx.nbytes) / 1024 / 1024, 1),
+        "numpy": summarize(time_index(index, query_ids, args.k, None)),
+        f"numpy_radius_{args.radius_km}km": summarize(time_index(index, query_ids, args.k, args.radius_km)),
+    }
+
+    if args.sql:
+        db_config = {
+            'host': args.db_host,
+            'port': args.db_port,
+            'user': args.db_user,
+            'password': args.db_password,
+            'database': args.db_name,
+        }
+        conn = load_bench_table(db_config, rows)
+        try:
+            cursor = conn.cursor()
+            sql = naive_sql(index)
+            samples = []
+            for room_id in query_ids:
+                started = time.perf_counter()
+                cursor.execute(sql, (int(room_id), int(room_id), args.k))
+                cursor.fetchall()
+                samples.append(time.perf_counter() - started)
+            report["naive_sql"] = summarize(samples)
+            report["speedup_p50"] = round(report["naive_sql"]["p50_ms"] / max(report["numpy"]["p50_ms"], 1e-6), 1)
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        finally:
+            conn.close()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    p95 = report["numpy"]["p95_ms"]
+    print(f"{'✅' if p95 < 10 else '⚠️'} numpy top-{args.k} p95 {p95}ms ({len(index)}건, 목표 10ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+오프라인 벤치마크
+- bench_server.py 의 로컬 가짜 사이트를 대상으로 수집 → 상세 → DB 적재를 끝까지 돌린다
+- listings/sec, bytes/listing, 단계별 p95 지연시간을 출력
+- --baseline 파일보다 처리량이 tolerance 이상 떨어지면 exit 1 (CI 용)
+- --parity 면 같은 매물을 빠른 경로(lxml)와 브라우저(inner_text)로 각각 읽어서 값이 다르면 exit 1
+
+예) python benchmark.py --listings 30 --latency-ms 50 --no-db --baseline bench_baseline.json
+"""
+import argparse, asyncio, json, math, os, shutil, sys, tempfile, time
+
+from bench_server import FixtureServer, FixtureState
+from list import SimpleURLCollector
+from peterdb import fetch_room_info, scrape_peterpan_room_info
+from fast_detail import FETCH_STATS, get_session, parse_room_html
+from image_store import get_image_store
+from jsontodb2 import insert_room_and_images, parse_management_fee
+
+
+def percentile(samples, p):
+    """nearest-rank 방식 백분위수"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def check_parity(urls, work_dir):
+    """
+    빠른 경로와 브라우저 결과 비교 → [(url, 항목, 빠른 경로 값, 브라우저 값)]
+    관리비처럼 여러 줄인 칸은 parse_management_fee 결과까지 같아야 한다
+    """
+    session = get_session()
+    mismatches = []
+    for url in urls:
+        fast_info, fast_pid, _ = parse_room_html(session.get(url, timeout=10).text, url)
+        browser_info, browser_pid, _ = scrape_peterpan_room_info(url, work_dir, settle_seconds=0)
+        if not fast_pid or not browser_pid:
+            # 주입한 오류 페이지를 받은 경우는 비교하지 않는다
+            continue
+        if fast_pid != browser_pid:
+            mismatches.append((url, "매물번호", fast_pid, browser_pid))
+        for key, value in browser_info.items():
+            if key != "property_url" and fast_info.get(key) != value:
+                mismatches.append((url, key, fast_info.get(key), value))
+        fast_fee = parse_management_fee(fast_info.get("관리비", ""))
+        browser_fee = parse_management_fee(browser_info.get("관리비", ""))
+        if fast_fee != browser_fee:
+            mismatches.append((url, "관리비(파싱)", fast_fee, browser_fee))
+    return mismatches
+
+
+def run_benchmark(args):
+    state = FixtureState(
+        listings=args.listings,
+        page_size=args.page_size,
+        photos_per_listing=args.photos,
+        photo_bytes=args.photo_bytes,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        shared_photo_rate=args.shared_photo_rate,
+    )
+    db_config = None if args.no_db else {
+        'host': args.db_host,
+        'port': args.db_port,
+        'user': args.db_user,
+        'password': args.db_password,
+        'database': args.db_name
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="scarp_bench_")
+    info_dir = os.path.join(work_dir, "info")
+    img_dir = os.path.join(work_dir, "img")
+    os.makedirs(info_dir, exist_ok=True)
+
+    stage_times = {"collect": [], "detail": [], "load": []}
+    scraped = 0
+    failed = 0
+    parity = None
+
+    try:
+        with FixtureServer(state) as server:
+            # 1. 리스트 수집 (DB 없으면 save_to_database 는 오류만 출력하고 넘어간다)
+            collector = SimpleURLCollector(db_config or {}, base_url=server.base_url)
+            start = time.perf_counter()
+            urls = asyncio.run(collector.collect_urls(
+                list_page_url=f"{server.base_url}/onetworoom",
+                area_name="벤치마크",
+                max_items=args.listings,
+                scroll_seconds=args.scroll_seconds
+            ))
+            stage_times["collect"].append(time.perf_counter() - start)
+
+            run_start = time.perf_counter()
+
+            # 2. 상세 페이지
+            json_files = []
+            for url in urls:
+                start = time.perf_counter()
+                data, pid, _ = fetch_room_info(url, work_dir, settle_seconds=0)
+                stage_times["detail"].append(time.perf_counter() - start)
+                if not pid:
+                    failed += 1
+                    continue
+                file_path = os.path.join(info_dir, f"{pid}.json")
+                with open(file_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                json_files.append(file_path)
+                scraped += 1
+
+            # 3. DB 적재
+            if db_config:
+                for file_path in json_files:
+                    start = time.perf_counter()
+                    insert_room_and_images(db_config, file_path, image_dir=img_dir)
+                    stage_times["load"].append(time.perf_counter() - start)
+
+            elapsed = time.perf_counter() - run_start
+            if args.parity:
+                parity = check_parity(urls, work_dir)
+            total_bytes = state.total_bytes()
+            photo_report = get_image_store(os.path.join(work_dir, "img_store")).report()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "listings": args.listings,
+        "collected": len(urls),
+        "scraped": scraped,
+        "failed": failed,
+        "injected_errors": state.errors,
+        "fast_path": FETCH_STATS.fast,
+        "fallback": FETCH_STATS.fallback,
+        "elapsed_sec": round(elapsed, 3),
+        "listings_per_sec": round(scraped / elapsed, 4) if elapsed else 0.0,
+        "bytes_per_listing": round(total_bytes / scraped) if scraped else None,
+        "bytes_by_kind": dict(state.bytes_sent),
+        "photo_dedup_ratio": photo_report["dedup_ratio"],
+        "photo_bytes_saved": photo_report["disk_bytes_saved"] + photo_report["download_bytes_saved"],
+        "fast_no_photos": FETCH_STATS.no_photos,
+        "parity_mismatches": parity,
+        "p95_sec": {
+            stage: round(percentile(samples, 95), 4) if samples else None
+            for stage, samples in stage_times.items()
+        },
+    }
+
+
+def check_regression(report, baseline_path, tolerance):
+    """baseline 대비 처리량이 tolerance 이상 떨어졌으면 False"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    expected = baseline["listings_per_sec"]
+    floor = expected * (1 - tolerance)
+    actual = report["listings_per_sec"]
+    if actual < floor:
+        print(f"❌ 처리량 회귀: {actual} listings/sec < {floor:.4f} (baseline {expected}, 허용 {tolerance:.0%})")
+        return False
+    print(f"✅ 처리량 OK: {actual} listings/sec (baseline {expected})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 픽스처 서버 기반 스크래퍼 벤치마크")
+    parser.add_argument("--listings", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--photos", type=int, default=5)
+    parser.add_argument("--photo-bytes", type=int, default=40000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--shared-photo-rate", type=float, default=0.0, help="건물 사진을 재사용하는 매물 비율")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scroll-seconds", type=float, default=5)
+    parser.add_argument("--no-db", action="store_true", help="DB 적재 단계 생략")
+    parser.add_argument("--db-host", default="localhost")
+    parser.add_argument("--db-port", type=int, default=3310)
+    parser.add_argument("--db-user", default="root")
+    parser.add_argument("--db-password", default="1234")
+    parser.add_argument("--db-name", default="bangu_bench")
+    parser.add_argument("--baseline", help="비교할 baseline JSON 경로")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 처리량 하락 비율")
+    parser.add_argument("--save-baseline", help="이번 결과를 baseline 으로 저장")
+    parser.add_argument("--parity", action="store_true", help="빠른 경로와 브라우저 파싱 결과 비교")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ baseline 저장: {args.save_baseline}")
+
+    if args.baseline and not check_regression(report, args.baseline, args.tolerance):
+        sys.exit(1)
+
+    if args.parity:
+        if report["parity_mismatches"]:
+            print(f"❌ 빠른 경로/브라우저 결과 불일치 {len(report['parity_mismatches'])}건")
+            sys.exit(1)
+        print("✅ 빠른 경로/브라우저 결과 일치")
+
+
+if __name__ == "__main__":
+    main()
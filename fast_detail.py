@@ -0,0 +1,284 @@
+"""
+HTTP 우선 상세 페이지 수집기
+- 브라우저 없이 커넥션 풀(requests.Session)로 HTML을 받아 lxml(C 파서)로 파싱
+- 필수 항목이 빠지면 누락 목록을 돌려주고, 호출하는 쪽(peterdb.fetch_room_info)이 Playwright 로 재시도
+"""
+import os, re, json, threading
+import requests
+from requests.adapters import HTTPAdapter
+from lxml import html as lxml_html
+
+from image_store import get_image_store
+from seen_set import canonical_house_id
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# 이게 하나라도 없으면 빠른 경로 실패로 본다
+REQUIRED_FIELDS = ('위도', '경도', '거래방식')
+
+# 상태 JSON 에서 매물 ID 가 들어있는 키
+STATE_ID_KEYS = ('hidx', 'houseId', 'house_id')
+
+# inner_text 에서 앞뒤로 줄이 바뀌는 태그
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p',
+    'pre', 'section', 'table', 'tr', 'ul',
+))
+
+_local = threading.local()
+
+
+def get_session(pool_size=10):
+    """스레드마다 하나씩 재사용하는 HTTP 세션 (keep-alive 커넥션 풀)"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        _local.session = session
+    return session
+
+
+class FetchStats:
+    """빠른 경로 / 브라우저 fallback 비율 집계"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fast = 0
+        self.fallback = 0
+        self.failed = 0
+        self.no_photos = 0  # 빠른 경로로 끝났는데 사진이 0장인 매물
+        self.missing = {}
+
+    def record(self, path, missing=()):
+        with self.lock:
+            setattr(self, path, getattr(self, path) + 1)
+            for field in missing:
+                self.missing[field] = self.missing.get(field, 0) + 1
+
+    def record_no_photos(self):
+        with self.lock:
+            self.no_photos += 1
+
+    def summary(self):
+        total = self.fast + self.fallback + self.failed
+        if not total:
+            return "수집한 매물 없음"
+        return (f"빠른 경로 {self.fast}/{total} ({self.fast / total:.0%}), "
+                f"fallback {self.fallback}/{total} ({self.fallback / total:.0%}), "
+                f"실패 {self.failed}, 사진 없음 {self.no_photos}, 누락 항목 {self.missing}")
+
+
+FETCH_STATS = FetchStats()
+
+
+def _text(el):
+    """
+    브라우저 inner_text 처럼 <br> 과 블록 태그(div, p, li ...) 경계는 줄바꿈, 줄마다 공백 정리
+    (관리비 칸처럼 <div> 여러 개로 된 값을 parse_management_fee 가 줄 단위로 읽는다)
+    """
+    if el is None:
+        return ''
+    parts = []
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else None  # 주석 등은 None
+        if tag in ('script', 'style'):
+            return
+        block = tag in BLOCK_TAGS
+        if tag == 'br' or block:
+            parts.append('\n')
+        if tag and node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if block:
+            parts.append('\n')
+
+    walk(el)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line).strip()
+
+
+def _enclosing_brace(text, pos):
+    """pos 를 감싸는 가장 가까운 '{' 위치 (없으면 None)"""
+    depth = 0
+    for i in range(pos - 1, -1, -1):
+        if text[i] == '}':
+            depth += 1
+        elif text[i] == '{':
+            if not depth:
+                return i
+            depth -= 1
+    return None
+
+
+def _state_blob_object(doc, house_id):
+    """
+    인라인 스크립트(상태 JSON)에서 이 매물 ID 를 직접 가진 객체(dict) 찾기
+    상태 JSON 에는 추천/주변 매물도 섞여 있어서, 다른 매물 객체의 값을 가져오지 않도록 객체 단위로 본다
+    """
+    house_id = str(house_id)
+    pattern = re.compile(r'"(?:%s)"\s*:\s*"?%s(?![\d.])' % ('|'.join(STATE_ID_KEYS), house_id))
+    decoder = json.JSONDecoder()
+    for script in doc.xpath('//script[not(@src)]/text()'):
+        for match in pattern.finditer(script):
+            start = _enclosing_brace(script, match.start())
+            if start is None:
+                continue
+            try:
+                obj, _ = decoder.raw_decode(script, start)
+            except ValueError:
+                continue
+            if isinstance(obj, dict) and any(str(obj.get(key)) == house_id for key in STATE_ID_KEYS):
+                return obj
+    return None
+
+
+def _coordinate(obj, keys):
+    for key in keys:
+        value = obj.get(key)
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool) and str(value).strip():
+            return str(value)
+    return None
+
+
+def parse_room_html(page_html, url=None):
+    """
+    상세 페이지 HTML → (room_info, property_id, photo_urls)
+    Playwright 버전(scrape_peterpan_room_info)과 같은 키로 채운다
+    photo_urls 는 사진 영역(#photoCarousel) 자체가 없으면 None (JS 로 그려지는 경우 → 브라우저로 재시도)
+    """
+    doc = lxml_html.fromstring(page_html)
+    room_info = {}
+
+    # 매물 번호
+    property_id = None
+    id_nodes = doc.xpath('//*[@id="sidebar-content"]//*[contains(concat(" ", normalize-space(@class), " "), " house-index ")]/span')
+    if id_nodes:
+        property_id = _text(id_nodes[0]) or None
+
+    # 상태 JSON 에는 추천/주변 매물도 섞여 있으니 요청한 URL 의 /house/<id> 를 가진 객체만 쓴다
+    # (없으면 누락으로 보고 브라우저로 재시도 — 다른 매물 값으로 저장해서 덮어쓰면 안 된다)
+    expected = canonical_house_id(url) if url else canonical_house_id(property_id)
+    state = _state_blob_object(doc, expected) if expected is not None else None
+    if not property_id and state is not None:
+        property_id = str(expected)
+
+    # 테이블 정보
+    for row in doc.xpath('//div[contains(@class, "detail-table-row")]'):
+        th = row.xpath('.//div[contains(@class, "detail-table-th")]')
+        td = row.xpath('.//div[contains(@class, "detail-table-td")]')
+        key = _text(th[0]) if th else ''
+        value = _text(td[0]) if td else ''
+        if key and value:
+            room_info[key] = value
+
+    # 옵션
+    options = [_text(dd) for dd in doc.xpath('//div[contains(@class, "detail-option-table")]//dd | //dl[contains(@class, "detail-option-table")]//dd')]
+    room_info['추가옵션'] = ', '.join(o for o in options if o)
+
+    # 주소
+    addr = doc.xpath('//span[contains(@class, "address")]')
+    if addr:
+        room_info['주소'] = _text(addr[0])
+
+    # 위도, 경도 (meta 태그 → 없으면 상태 JSON)
+    lat = doc.xpath('//meta[@property="og:latitude"]/@content')
+    lng = doc.xpath('//meta[@property="og:longitude"]/@content')
+    room_info['위도'] = lat[0] if lat else (_coordinate(state, ('latitude', 'lat')) if state else None)
+    room_info['경도'] = lng[0] if lng else (_coordinate(state, ('longitude', 'lng')) if state else None)
+
+    # 사진
+    photo_urls = None
+    carousel = doc.xpath('//*[@id="photoCarousel"]')
+    if carousel:
+        photo_urls = [src for src in carousel[0].xpath('.//div[contains(@class, "carousel-inner")]//img[contains(@class, "photo")]/@src') if src]
+
+    return room_info, property_id, photo_urls
+
+
+def missing_fields(room_info, property_id, photo_urls=()):
+    missing = [field for field in REQUIRED_FIELDS if not room_info.get(field)]
+    if not property_id:
+        missing.insert(0, '매물번호')
+    if photo_urls is None:
+        missing.append('사진')
+    return missing
+
+
+def download_images(photo_urls, property_id, base_dir, session=None):
+    """
+    사진을 {base_dir}/img_store 에 중복 없이 저장하고 매물 사진 목록 기록
+    이미 받은 URL 은 요청하지 않고, 내용이 같거나 비슷한 사진은 기존 blob 을 가리킨다
+    """
+    session = session or get_session()
+    store = get_image_store(os.path.join(base_dir, "img_store"))
+
+    photos = []
+    for i, img_url in enumerate(photo_urls, 1):
+        known = store.lookup_url(img_url)
+        if known:
+            sha256, size = known
+            store.count("url_hits")
+            store.count("bytes_not_downloaded", size)
+            photos.append((i, sha256, img_url, size))
+            continue
+        try:
+            r = session.get(img_url, timeout=10)
+            if r.status_code == 200:
+                store.count("downloads")
+                store.count("bytes_downloaded", len(r.content))
+                sha256, _ = store.add(r.content, img_url)
+                photos.append((i, sha256, img_url, len(r.content)))
+        except Exception:
+            continue
+
+    store.set_listing_photos(property_id, photos)
+    store.flush_stats()
+    return photos
+
+
+def fetch_room_info_fast(url, base_dir, timeout=10):
+    """
+    빠른 경로: HTTP GET + lxml 파싱
+    Returns: (room_info, property_id, missing, error)
+      - missing 이 비어있지 않으면 fallback 필요
+      - error 는 요청 자체가 실패했을 때의 원인 ('timeout', 'network', 'gone', 'http_error')
+    """
+    session = get_session()
+    try:
+        r = session.get(url, timeout=timeout)
+    except requests.Timeout:
+        return {}, None, ['응답'], 'timeout'
+    except requests.RequestException as e:
+        print(f"⚠️ 빠른 경로 요청 실패: {e}")
+        return {}, None, ['응답'], 'network'
+    if r.status_code in (404, 410):
+        return {}, None, ['응답'], 'gone'
+    if r.status_code != 200:
+        return {}, None, ['응답'], 'http_error'
+
+    room_info, property_id, photo_urls = parse_room_html(r.text, url)
+    missing = missing_fields(room_info, property_id, photo_urls)
+    if missing:
+        return room_info, property_id, missing, None
+
+    if not photo_urls:
+        # 사진 영역은 있는데 비어 있음 — 정말 사진 없는 매물인지 집계로 확인할 수 있게
+        FETCH_STATS.record_no_photos()
+    download_images(photo_urls, property_id, base_dir, session=session)
+    room_info['property_url'] = url
+    return room_info, property_id, [], None
+
+
+if __name__ == "__main__":
+    import sys
+    for target in sys.argv[1:]:
+        info, pid, missing, error = fetch_room_info_fast(target, "scraped_data")
+        print(json.dumps({"property_id": pid, "missing": missing, "error": error, "info": info}, ensure_ascii=False, indent=2))
@@ -0,0 +1,310 @@
+"""
+매물 사진 중복 제거 저장소
+- 중개사가 같은 건물 사진을 매물 수십 개에 재사용하므로 사진 본문을 sha256 이름으로 한 번만 저장
+  (scraped_data/img_store/blobs/ab/abcd....jpg)
+- Pillow 가 있으면 dHash(64비트 perceptual hash)도 계산해서 해밍 거리 PHASH_DISTANCE 이하인
+  사진(재압축/리사이즈된 같은 사진)은 먼저 저장된 blob 으로 합친다
+- 원본 URL → blob 인덱스가 있어서 이미 받은 URL 은 다운로드 자체를 건너뛴다
+- 매물별 사진 목록(매물 ID, 순서 → blob)도 여기 기록, jsontodb2 가 images 행에 blob 경로/해시를 넣는다
+- 인덱스는 SQLite(WAL) — 워커 프로세스 여러 개가 같이 쓴다
+
+예) python image_store.py                                   # 중복 제거 리포트
+    python image_store.py --import-legacy scraped_data/img   # 예전 {매물ID}_{n}.jpg 파일 가져오기
+"""
+import argparse, hashlib, io, os, re, sqlite3, threading, time
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+STORE_DIR = "scraped_data/img_store"
+PHASH_DISTANCE = 6
+
+LEGACY_NAME_RE = re.compile(r'^(\d+)_(\d+)\.jpg$')
+
+
+def dhash(content):
+    """
+    difference hash: 9x8 흑백으로 줄여서 옆 픽셀보다 밝은지 → 64비트
+    Pillow 가 없거나 이미지가 아니면 None
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            pixels = np.asarray(img.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    except Exception:
+        return None
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def to_signed64(value):
+    """SQLite INTEGER 는 부호 있는 64비트"""
+    return value - (1 << 64) if value is not None and value >= 1 << 63 else value
+
+
+class ImageStore:
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self.blob_dir = os.path.join(store_dir, "blobs")
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        # perceptual hash 비교용 메모리 사본 (다른 프로세스가 추가한 건 rowid 로 이어서 읽는다)
+        self.phash_rowid = 0
+        self.phash_values = np.zeros(0, dtype=np.uint64)
+        self.phash_shas = []
+        self.stats = {"downloads": 0, "url_hits": 0, "exact_dups": 0, "near_dups": 0,
+                      "bytes_downloaded": 0, "bytes_not_downloaded": 0, "bytes_not_stored": 0}
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def db(self):
+        """프로세스마다 따로 연결 (fork 한 연결은 못 쓴다)"""
+        if self.conn is None or self.pid != os.getpid():
+            self.conn = sqlite3.connect(os.path.join(self.store_dir, "index.db"), timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    phash INTEGER,
+                    created_at REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS sources (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS photos (
+                    property_id TEXT NOT NULL,
+                    image_order INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    url TEXT,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (property_id, image_order)
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_photos_sha ON photos (sha256)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self.conn.commit()
+            self.pid = os.getpid()
+            self.phash_rowid = 0
+            self.phash_values = np.zeros(0, dtype=np.uint64)
+            self.phash_shas = []
+        return self.conn
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256[:2], f"{sha256}.jpg")
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    # --- 조회 ---
+
+    def lookup_url(self, url):
+        """이미 받은 URL 이면 (sha256, size), 아니면 None"""
+        with self.lock:
+            row = self.db().execute(
+                "SELECT s.sha256, b.size FROM sources s JOIN blobs b ON b.sha256 = s.sha256 WHERE s.url=?", (url,)
+            ).fetchone()
+        if row and os.path.exists(self.blob_path(row[0])):
+            return row
+        return None
+
+    def find_similar(self, phash):
+        """해밍 거리 PHASH_DISTANCE 이하인 기존 blob 의 sha256 (가장 가까운 것)"""
+        with self.lock:
+            rows = self.db().execute(
+                "SELECT rowid, sha256, phash FROM blobs WHERE phash IS NOT NULL AND rowid > ? ORDER BY rowid",
+                (self.phash_rowid,)
+            ).fetchall()
+            if rows:
+                self.phash_rowid = rows[-1][0]
+                self.phash_shas.extend(sha for _, sha, _ in rows)
+                self.phash_values = np.concatenate([
+                    self.phash_values, np.array([p for _, _, p in rows], dtype=np.int64).view(np.uint64)
+                ])
+            if not len(self.phash_values):
+                return None
+            diff = self.phash_values ^ np.uint64(phash)
+            if hasattr(np, "bitwise_count"):
+                distance = np.bitwise_count(diff)
+            else:
+                distance = np.unpackbits(diff.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+            best = int(np.argmin(distance))
+            return self.phash_shas[best] if distance[best] <= PHASH_DISTANCE else None
+
+    # --- 저장 ---
+
+    def add(self, content, url=None):
+        """
+        사진 본문 저장 → (sha256, 종류)
+        종류: 'new' 새로 저장 / 'exact' 같은 내용이 이미 있음 / 'near' 비슷한 사진으로 합침
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        kind = "new"
+        with self.lock:
+            known = self.db().execute("SELECT 1 FROM blobs WHERE sha256=?", (sha256,)).fetchone()
+        if known:
+            kind = "exact"
+        else:
+            phash = dhash(content)
+            similar = self.find_similar(phash) if phash is not None else None
+            if similar:
+                sha256, kind = similar, "near"
+            else:
+                path = self.blob_path(sha256)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+                with self.lock:
+                    conn = self.db()
+                    conn.execute(
+                        "INSERT OR IGNORE INTO blobs (sha256, size, phash, created_at) VALUES (?, ?, ?, ?)",
+                        (sha256, len(content), to_signed64(phash), time.time())
+                    )
+                    conn.commit()
+
+        if kind != "new":
+            self.count(f"{kind}_dups")
+            self.count("bytes_not_stored", len(content))
+        if url:
+            with self.lock:
+                conn = self.db()
+                conn.execute("INSERT OR REPLACE INTO sources (url, sha256) VALUES (?, ?)", (url, sha256))
+                conn.commit()
+        return sha256, kind
+
+    def set_listing_photos(self, property_id, photos):
+        """매물 사진 목록 교체: photos = [(순서, sha256, url, 원래 크기)]"""
+        with self.lock:
+            conn = self.db()
+            conn.execute("DELETE FROM photos WHERE property_id=?", (str(property_id),))
+            conn.executemany(
+                "INSERT INTO photos (property_id, image_order, sha256, url, size) VALUES (?, ?, ?, ?, ?)",
+                [(str(property_id), order, sha256, url, size) for order, sha256, url, size in photos]
+            )
+            conn.commit()
+
+    def listing_photos(self, property_id=None):
+        """
+        매물별 사진 → {property_id: [(blob 경로, 순서, 썸네일 여부, sha256, url)]}
+        property_id 를 주면 그 매물만
+        """
+        sql = "SELECT property_id, image_order, sha256, url FROM photos"
+        params = ()
+        if property_id is not None:
+            sql += " WHERE property_id=?"
+            params = (str(property_id),)
+        with self.lock:
+            rows = self.db().execute(sql + " ORDER BY property_id, image_order", params).fetchall()
+        listings = {}
+        for pid, order, sha256, url in rows:
+            listings.setdefault(pid, []).append((self.blob_path(sha256), order, order == 1, sha256, url))
+        return listings
+
+    def import_file(self, path):
+        """로컬 파일 저장 → (sha256, 크기)"""
+        with open(path, "rb") as f:
+            content = f.read()
+        sha256, _ = self.add(content)
+        return sha256, len(content)
+
+    # --- 통계 ---
+
+    def flush_stats(self):
+        """이번 프로세스 통계를 공유 통계에 더하고 초기화"""
+        with self.lock:
+            conn = self.db()
+            for name, value in self.stats.items():
+                conn.execute(
+                    "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, value)
+                )
+            conn.commit()
+            self.stats = {name: 0 for name in self.stats}
+
+    def report(self):
+        """중복 제거율 / 절약 용량"""
+        with self.lock:
+            conn = self.db()
+            refs, logical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM photos").fetchone()
+            blobs, stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            referenced = conn.execute("SELECT COUNT(DISTINCT sha256) FROM photos").fetchone()[0]
+            totals = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        return {
+            "photo_refs": refs,
+            "unique_blobs": blobs,
+            "referenced_blobs": referenced,
+            "dedup_ratio": round(refs / referenced, 2) if referenced else None,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "disk_bytes_saved": max(logical - stored, 0),
+            "download_bytes_saved": totals.get("bytes_not_downloaded", 0),
+            "counters": totals,
+        }
+
+
+_stores = {}
+
+
+def get_image_store(store_dir=STORE_DIR):
+    """프로세스 안에서는 같은 저장소 객체 재사용"""
+    if store_dir not in _stores:
+        _stores[store_dir] = ImageStore(store_dir)
+    return _stores[store_dir]
+
+
+def import_legacy(store, image_dir, delete=False):
+    """예전 방식 {매물ID}_{n}.jpg 파일을 저장소로 옮기기 (매물 사진 목록도 기록)"""
+    listings = {}
+    for fname in sorted(os.listdir(image_dir)):
+        match = LEGACY_NAME_RE.match(fname)
+        if match:
+            listings.setdefault(match.group(1), []).append((int(match.group(2)), os.path.join(image_dir, fname)))
+
+    known = store.listing_photos()
+    imported = 0
+    for property_id, files in listings.items():
+        if property_id in known:
+            continue
+        photos = []
+        for order, path in sorted(files):
+            sha256, size = store.import_file(path)
+            photos.append((order, sha256, None, size))
+        store.set_listing_photos(property_id, photos)
+        imported += len(photos)
+        if delete:
+            for _, path in files:
+                os.remove(path)
+    store.flush_stats()
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="매물 사진 중복 제거 저장소 리포트")
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--import-legacy", metavar="IMG_DIR", help="예전 {매물ID}_{n}.jpg 폴더 가져오기")
+    parser.add_argument("--delete-legacy", action="store_true", help="가져온 예전 파일 삭제")
+    args = parser.parse_args()
+
+    store = get_image_store(args.store_dir)
+    if args.import_legacy:
+        imported = import_legacy(store, args.import_legacy, delete=args.delete_legacy)
+        print(f"✅ 예전 사진 {imported}장 가져옴")
+    if Image is None:
+        print("⚠️ Pillow 가 없어 완전히 같은 사진만 합칩니다 (pip install Pillow 하면 비슷한 사진도)")
+
+    r = store.report()
+    c = r["counters"]
+    print(f"📦 사진 {r['photo_refs']}장 → blob {r['referenced_blobs']}개 (중복 제거율 {r['dedup_ratio'] or 0}x)")
+    print(f"📦 디스크 {r['stored_bytes'] / 1024 / 1024:.1f}MB 사용, "
+          f"{r['disk_bytes_saved'] / 1024 / 1024:.1f}MB 절약 / 다운로드 {r['download_bytes_saved'] / 1024 / 1024:.1f}MB 절약")
+    print(f"📊 다운로드 {c.get('downloads', 0)} / URL 재사용 {c.get('url_hits', 0)} / "
+          f"같은 사진 {c.get('exact_dups', 0)} / 비슷한 사진 {c.get('near_dups', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
-import os, json, pymysql, re
+import os, json, pymysql, re, hashlib
+from concurrent.futures import ProcessPoolExecutor
+from market_export import export_snapshot
+from similar_index import update_similar_index
+from image_store import get_image_store, LEGACY_NAME_RE
 
 # JSON → DB 컬럼 매핑
 COLUMN_MAPPING = {
@@ -190,16 +194,9 @@ def extract_first_m2_value(text_list):
             results.append(None) # 패턴을 찾지 못한 경우 None 추가
     return results
 
-def insert_room_and_images(db_config, json_file, image_dir="scraped_data/img"):
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # property_url과 property_id 확인
-    property_url = data.get("property_url")
-    property_id = os.path.splitext(os.path.basename(json_file))[0]
-
-    # DB 데이터 변환
-    db_data = {"property_url": property_url}
+def build_room_record(data):
+    """JSON dict → room 테이블 컬럼 dict"""
+    db_data = {"property_url": data.get("property_url")}
     for k, v in data.items():
         if k in COLUMN_MAPPING:
             col = COLUMN_MAPPING[k]
@@ -216,44 +213,84 @@ def insert_room_and_images(db_config, json_file, image_dir="scraped_data/img"):
                 db_data[col] = extract_first_m2_value([v])[0]
             else:
                 db_data[col] = v
+    return db_data
+
+
+def store_dir_for(image_dir):
+    """사진 저장소는 img 폴더 옆 (scraped_data/img → scraped_data/img_store)"""
+    return os.path.join(os.path.dirname(os.path.normpath(image_dir)), "img_store")
+
+
+def list_property_images(image_dir, property_id, fnames=None, stored=None):
+    """
+    매물 사진 → [(경로, 순서, 썸네일 여부, 내용 해시, 원본 URL)]
+    image_store 에 기록된 사진(stored)이 있으면 공유 blob 경로, 없으면 예전 방식 {property_id}_{n}.jpg 파일
+    """
+    if stored:
+        return stored
+    if fnames is None:
+        fnames = os.listdir(image_dir) if os.path.exists(image_dir) else []
+    images = []
+    for fname in fnames:
+        # {property_id}_{n}.jpg 꼴이 아닌 파일(1000_cover.jpg 등)은 건너뛴다
+        match = LEGACY_NAME_RE.match(fname)
+        if match and match.group(1) == property_id:
+            order = int(match.group(2))
+            images.append((f"{image_dir}/{fname}", order, order == 1, None, None))
+    return sorted(images, key=lambda image: image[1])
+
+
+def write_room(cursor, db_data, images):
+    """room upsert + images 교체. room_id 반환"""
+    cols = ", ".join(db_data.keys())
+    vals = ", ".join(["%s"] * len(db_data))
+    # id=LAST_INSERT_ID(id): 기존 행을 갱신한 경우에도 lastrowid 로 id 를 받기 위해
+    updates = [f"{c}=VALUES({c})" for c in db_data.keys() if c != "property_url"] + ["id=LAST_INSERT_ID(id)"]
+    sql = f"""
+    INSERT INTO room ({cols})
+    VALUES ({vals})
+    ON DUPLICATE KEY UPDATE {", ".join(updates)}
+    """
+    cursor.execute(sql, list(db_data.values()))
+
+    # room_id 가져오기
+    room_id = cursor.lastrowid
+    if not room_id:
+        cursor.execute("SELECT id FROM room WHERE property_url=%s", (db_data["property_url"],))
+        row = cursor.fetchone()
+        room_id = row[0] if row else None
+
+    # 이미지 테이블 insert
+    if room_id:
+        cursor.execute("DELETE FROM images WHERE property_id=%s", (room_id,))
+        if images:
+            cursor.executemany(
+                "INSERT INTO images (property_id, image_path, image_order, is_thumbnail, content_hash, source_url) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [(room_id, *image) for image in images]
+            )
+    return room_id
+
+
+def insert_room_and_images(db_config, json_file, image_dir="scraped_data/img"):
+    with open(json_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    # property_url과 property_id 확인
+    property_id = os.path.splitext(os.path.basename(json_file))[0]
+    db_data = build_room_record(data)
+    stored = get_image_store(store_dir_for(image_dir)).listing_photos(property_id).get(property_id)
+    images = list_property_images(image_dir, property_id, stored=stored)
 
     # DB 연결
     conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True, autocommit=False)
     cursor = conn.cursor()
 
     try:
-        cols = ", ".join(db_data.keys())
-        vals = ", ".join(["%s"] * len(db_data))
-        sql = f"""
-        INSERT INTO room ({cols})
-        VALUES ({vals})
-        ON DUPLICATE KEY UPDATE {", ".join([f"{c}=VALUES({c})" for c in db_data.keys() if c != "property_url"])}
-        """
-        cursor.execute(sql, list(db_data.values()))
-
-        # room_id 가져오기
-        room_id = cursor.lastrowid
-        if not room_id:
-            cursor.execute("SELECT id FROM room WHERE property_url=%s", (property_url,))
-            row = cursor.fetchone()
-            room_id = row[0] if row else None
-
-        # 이미지 테이블 insert
-        if room_id:
-            cursor.execute("DELETE FROM images WHERE property_id=%s", (room_id,))
-            if os.path.exists(image_dir):
-                for fname in os.listdir(image_dir):
-                    if fname.startswith(property_id):
-                        file_path = os.path.join(image_dir, fname)
-                        order = int(fname.split("_")[-1].split(".")[0])
-                        is_thumb = (order == 1)
-                        cursor.execute(
-                            "INSERT INTO images (property_id, image_path, image_order, is_thumbnail) VALUES (%s, %s, %s, %s)",
-                            (room_id, f"{image_dir}/{fname}", order, is_thumb)
-                        )
-
+        room_id = write_room(cursor, db_data, images)
         conn.commit()
         print(f"✅ {json_file} → DB 적재 완료 (room_id={room_id})")
+        return room_id
 
     except Exception as e:
         conn.rollback()
@@ -263,6 +300,184 @@ def insert_room_and_images(db_config, json_file, image_dir="scraped_data/img"):
         conn.close()
 
 
+# ---------------------------------------------------------------------------
+# 증분 + 병렬 적재
+# - manifest 에 (파일 크기, mtime, 내용 해시, 사진 목록) → 적재 상태를 기록해 두고 바뀐 파일만 다시 적재
+# - JSON 파싱/정규화는 프로세스 풀, DB 쓰기는 메인 프로세스 하나가 batch 단위로 커밋
+# - batch 커밋마다 manifest 를 저장하므로 중간에 죽어도 다음 실행이 거기서부터 이어감
+# ---------------------------------------------------------------------------
+
+MANIFEST_PATH = "scraped_data/load_manifest.json"
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """임시 파일에 쓰고 바꿔치기 (저장 중에 죽어도 manifest 가 깨지지 않게)"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def legacy_image_names(image_dir):
+    """예전 방식 사진 파일 → {property_id: [파일명]}"""
+    image_names = {}
+    if os.path.exists(image_dir):
+        for fname in os.listdir(image_dir):
+            match = LEGACY_NAME_RE.match(fname)
+            if match:
+                image_names.setdefault(match.group(1), []).append(fname)
+    return image_names
+
+
+def file_fingerprint(path, images):
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "images": [image[0] for image in images],
+    }
+
+
+def find_changed_files(json_dir, image_dir, manifest):
+    """
+    새로 생겼거나 바뀐 JSON 파일 목록 → [(파일명, 핑거프린트, 사진 목록)]
+    크기/mtime/사진 목록이 그대로면 해시도 안 읽고 건너뛴다
+    """
+    image_names = legacy_image_names(image_dir)
+    stored = get_image_store(store_dir_for(image_dir)).listing_photos()
+
+    changed = []
+    for fname in sorted(os.listdir(json_dir)):
+        if not fname.endswith(".json"):
+            continue
+        path = os.path.join(json_dir, fname)
+        property_id = os.path.splitext(fname)[0]
+        images = list_property_images(image_dir, property_id, image_names.get(property_id, []), stored.get(property_id))
+        fingerprint = file_fingerprint(path, images)
+
+        entry = manifest.get(fname)
+        if entry and entry.get("state") == "loaded" and all(entry.get(k) == v for k, v in fingerprint.items()):
+            continue
+
+        fingerprint["sha256"] = file_hash(path)
+        if (entry and entry.get("state") == "loaded" and entry.get("sha256") == fingerprint["sha256"]
+                and entry.get("images") == fingerprint["images"]):
+            # 내용은 그대로고 mtime 만 바뀐 경우
+            entry.update(fingerprint)
+            continue
+        changed.append((fname, fingerprint, images))
+    return changed
+
+
+def record_loaded(loaded, image_dir="scraped_data/img", manifest_path=MANIFEST_PATH):
+    """
+    load_incremental 밖에서 (pipeline.py 처럼 insert_room_and_images 로) 적재한 파일도 manifest 에 기록
+    loaded = [(JSON 경로, room_id)] — 다음 증분 적재가 같은 파일을 다시 올리지 않게
+    """
+    manifest = load_manifest(manifest_path)
+    image_names = legacy_image_names(image_dir)
+    stored = get_image_store(store_dir_for(image_dir)).listing_photos()
+    for json_file, room_id in loaded:
+        fname = os.path.basename(json_file)
+        property_id = os.path.splitext(fname)[0]
+        images = list_property_images(image_dir, property_id, image_names.get(property_id, []), stored.get(property_id))
+        fingerprint = file_fingerprint(json_file, images)
+        fingerprint["sha256"] = file_hash(json_file)
+        manifest[fname] = dict(fingerprint, state="loaded", room_id=room_id)
+    save_manifest(manifest, manifest_path)
+
+
+def parse_json_file(path):
+    """프로세스 풀 작업: JSON 읽기 + 정규화 → (room 컬럼 dict 또는 None, 오류)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return build_room_record(json.load(f)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def load_incremental(db_config, json_dir="scraped_data/info", image_dir="scraped_data/img",
+                     manifest_path=MANIFEST_PATH, workers=None, batch_size=200):
+    """바뀐 JSON 만 병렬 파싱 → 단일 writer 가 batch 커밋. 적재한 room_id 목록 반환"""
+    manifest = load_manifest(manifest_path)
+    changed = find_changed_files(json_dir, image_dir, manifest)
+    total = len(changed)
+    print(f"📂 전체 {sum(1 for f in os.listdir(json_dir) if f.endswith('.json'))}개 중 새로/바뀐 파일 {total}개")
+    if not changed:
+        save_manifest(manifest, manifest_path)
+        return []
+
+    loaded_ids = []
+    failed = 0
+    conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True, autocommit=False)
+    cursor = conn.cursor()
+    pending = []
+
+    def flush():
+        conn.commit()
+        for fname, fingerprint, room_id in pending:
+            manifest[fname] = dict(fingerprint, state="loaded", room_id=room_id)
+        save_manifest(manifest, manifest_path)
+        pending.clear()
+
+    try:
+        paths = [os.path.join(json_dir, fname) for fname, _, _ in changed]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(parse_json_file, paths, chunksize=16)
+            for done, ((fname, fingerprint, images), (db_data, error)) in enumerate(zip(changed, results), 1):
+                if error is None:
+                    cursor.execute("SAVEPOINT room_file")
+                    try:
+                        room_id = write_room(cursor, db_data, images)
+                        pending.append((fname, fingerprint, room_id))
+                        loaded_ids.append(room_id)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT room_file")
+                        error = str(e)
+                if error is not None:
+                    failed += 1
+                    manifest[fname] = dict(fingerprint, state="failed", error=error)
+                    print(f"❌ {fname} → DB 적재 실패: {error}")
+
+                if done % batch_size == 0 or done == total:
+                    flush()
+                    print(f"⏳ {done}/{total} 처리 (적재 {len(loaded_ids)}, 실패 {failed})")
+    finally:
+        conn.close()
+
+    print(f"✅ 증분 적재 완료: {len(loaded_ids)}건 적재, {failed}건 실패")
+    return loaded_ids
+
+
+def after_load(db_config, loaded_ids):
+    """적재한 게 있으면 컬럼 스냅샷 + 시세 집계 + 유사 매물 인덱스 갱신"""
+    if not loaded_ids:
+        return
+    try:
+        export_snapshot(db_config)
+    except Exception as e:
+        print(f"❌ 스냅샷/시세 집계 실패: {e}")
+    try:
+        update_similar_index(db_config, loaded_ids)
+    except Exception as e:
+        print(f"❌ 유사 매물 인덱스 갱신 실패: {e}")
+
+
 def main():
     db_config = {
         'host': 'localhost',
@@ -272,10 +487,8 @@ def main():
         'database': 'bangu'
     }
 
-    json_dir = "scraped_data/info"
-    for fname in os.listdir(json_dir):
-        if fname.endswith(".json"):
-            insert_room_and_images(db_config, os.path.join(json_dir, fname))
+    loaded_ids = load_incremental(db_config)
+    after_load(db_config, loaded_ids)
 
 
 if __name__ == "__main__":
@@ -3,16 +3,27 @@ from playwright.async_api import async_playwright
 import pymysql
 import re
 from urllib.parse import urljoin
+from seen_set import SeenSet, load_seen_set, canonical_house_ids, house_url
+from asset_cache import install_asset_cache_async
+
+# 도림동 원/투룸 월세 리스트 페이지
+DEFAULT_LIST_PAGE_URL = 'https://www.peterpanz.com/onetworoom?zoomLevel=13&center=%7B"y":37.5457364,"_lat":37.5457364,"x":126.9586473,"_lng":126.9586473%7D&dong=&gungu=&filter=latitude:37.4898445~37.6015864%7C%7Clongitude:126.9397646~127.0736604%7C%7CcheckMonth:999~999%7C%7CcontractType;%5B"월세"%5D%7C%7CroomCount_etc;%5B"6층~9층","1층","2층~5층","10층%20이상","반지층/지하","옥탑"%5D%7C%7CisManagerFee;%5B"add"%5D%7C%7CbuildingType;%5B"원/투룸"%5D&'
 
 class SimpleURLCollector:
-    def __init__(self, db_config):
+    def __init__(self, db_config, base_url="https://www.peterpanz.com"):
         self.db_config = db_config
-        self.base_url = "https://www.peterpanz.com"
+        self.base_url = base_url
+        self.seen = None
+        # 이번 collect_urls 에서 새로 저장한 매물 ID
+        self.discovered = set()
         
-    async def collect_urls(self, list_page_url, area_name, max_items=50):
+    async def collect_urls(self, list_page_url, area_name, max_items=50, scroll_seconds=60, queue=None):
         """
         리스트 페이지에서 매물 URL들을 수집하고 DB에 저장
+        queue 를 넘기면 스크롤 중에 새 매물 ID를 발견하는 즉시 DB에 저장하고 queue 에 (매물 ID, 발견 시각) 을 넣는다
+        (queue 가 가득 차면 상세 수집이 따라올 때까지 스크롤도 멈춘다)
         """
+        self.discovered = set()
         print(f"=== {area_name} URL 수집 시작 ===")
         print(f"목표: {max_items}개 URL")
         
@@ -21,6 +32,8 @@ class SimpleURLCollector:
             context = await browser.new_context(
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
             )
+            # JS/CSS/폰트는 워커끼리 공유하는 디스크 캐시에서
+            asset_cache = await install_asset_cache_async(context)
             page = await context.new_page()
             
             try:
@@ -30,7 +43,7 @@ class SimpleURLCollector:
                 await page.wait_for_timeout(5000)
                 
                 # --- [수정된 부분 시작] ---
-                print("페이지 스크롤 시작 (10초간)...")
+                print(f"페이지 스크롤 시작 ({scroll_seconds}초간)...")
                 
                 # 스크롤 대상 요소 선택
                 scrollable_element_selector = "#mainPanelWrapper > div > div"
@@ -38,31 +51,94 @@ class SimpleURLCollector:
 
                 if scrollable_element:
                     scroll_start_time = asyncio.get_event_loop().time()
-                    while asyncio.get_event_loop().time() - scroll_start_time < 60:
+                    # queue 가 가득 차서 publish 에서 기다린 시간은 스크롤 시간에 넣지 않는다
+                    # (상세 수집이 느려도 스크롤 범위는 그대로)
+                    paused = 0.0
+                    while asyncio.get_event_loop().time() - scroll_start_time - paused < scroll_seconds:
                         # 스크롤 가능한 요소의 가장 아래로 스크롤
                         await scrollable_element.evaluate("el => el.scrollTop = el.scrollHeight")
                         # 새로운 내용이 로드되기를 기다림
                         await asyncio.sleep(1) # 1초 간격으로 스크롤
+                        # max_items 만큼 넘겼으면 스크롤만 계속하고 더 넘기지 않는다
+                        if queue is not None and len(self.discovered) < max_items:
+                            hidx_values = await page.eval_on_selector_all(
+                                "[data-hidx]", "els => els.map(el => el.getAttribute('data-hidx'))"
+                            )
+                            publish_start = asyncio.get_event_loop().time()
+                            await self.publish(canonical_house_ids(hidx_values), area_name, list_page_url, queue, max_items)
+                            paused += asyncio.get_event_loop().time() - publish_start
                     
                     print("✓ 스크롤 완료")
                 else:
                     print("✗ 스크롤 대상 요소를 찾을 수 없습니다.")
 
                 
-                # URL 수집
-                urls = await self.find_property_urls(page, max_items)
+                # URL 수집 → 매물 ID로 정규화
+                house_ids = canonical_house_ids(await self.find_property_urls(page, max_items))
+                urls = [house_url(house_id, self.base_url) for house_id in house_ids]
                 
-                # DB에 저장
-                if urls:
-                    saved_count = self.save_to_database(urls, area_name, list_page_url)
-                    print(f"✓ {saved_count}개 URL이 DB에 저장됨")
-                else:
+                # 이미 아는 매물은 메모리에서 거르고 새 것만 DB에 저장
+                # (queue 모드에서 스크롤 중에 저장한 건 이번 수집의 새 매물로 센다)
+                new_ids, known_ids = self.get_seen().split(house_ids)
+                known_ids = [house_id for house_id in known_ids if house_id not in self.discovered]
+                if queue is not None:
+                    await self.publish(new_ids, area_name, list_page_url, queue, max_items)
+                elif new_ids:
+                    self.save_new(new_ids, area_name, list_page_url)
+                print(f"✓ 이번 수집: 새 매물 {len(self.discovered)}개 / 이미 아는 매물 {len(known_ids)}개")
+                if not urls:
                     print("✗ 수집된 URL이 없습니다")
                 
                 return urls
                 
             finally:
                 await browser.close()
+                print(f"📦 정적 리소스 캐시: {asset_cache.summary()}")
+                asset_cache.flush_stats()
+    
+    def save_new(self, new_ids, area_name, source_page):
+        """
+        새 매물 ID를 DB에 저장하고 seen 에 추가
+        저장에 실패하면 seen 에 넣지 않고 None (다음 스크롤/다음 실행에서 다시 시도)
+        """
+        new_urls = [house_url(house_id, self.base_url) for house_id in new_ids]
+        saved_count = self.save_to_database(new_urls, area_name, source_page)
+        if saved_count is None:
+            return None
+        self.seen.add_many(new_ids)
+        self.discovered.update(new_ids)
+        print(f"✓ {saved_count}개 URL이 DB에 저장됨")
+        return new_urls
+    
+    async def publish(self, house_ids, area_name, source_page, queue, max_items=None):
+        """
+        새 매물만 골라서 DB에 먼저 저장(내구성) → queue 로 상세 워커에게 전달
+        max_items 를 주면 이번 수집에서 넘긴 개수가 그만큼 될 때까지만
+        """
+        new_ids, _ = self.get_seen().split(house_ids)
+        if max_items is not None:
+            new_ids = new_ids[:max(0, max_items - len(self.discovered))]
+        if not new_ids:
+            return 0
+        saved = await asyncio.to_thread(self.save_new, new_ids, area_name, source_page)
+        if saved is None:
+            # target_urls 에 행이 없으면 상세 워커가 선점할 수 없으니 넘기지 않는다
+            return 0
+        discovered_at = asyncio.get_running_loop().time()
+        for house_id in new_ids:
+            await queue.put((house_id, discovered_at))
+        return len(new_ids)
+    
+    def get_seen(self):
+        """DB에 이미 있는 매물 ID 집합 (처음 한 번만 읽어온다)"""
+        if self.seen is None:
+            try:
+                self.seen = load_seen_set(self.db_config)
+                print(f"✓ 기존 매물 {len(self.seen)}개 로드")
+            except Exception as e:
+                print(f"기존 매물 로드 실패: {str(e)}")
+                self.seen = SeenSet()
+        return self.seen
     
     async def find_property_urls(self, page, max_items):
         """페이지에서 매물 URL들 찾기"""
@@ -308,7 +384,7 @@ class SimpleURLCollector:
             return []
     
     def save_to_database(self, urls, area_name, source_page):
-        """URL들을 데이터베이스에 저장"""
+        """URL들을 데이터베이스에 저장. 새로 들어간 개수, 실패하면 None"""
         connection = None
         try:
             connection = pymysql.connect(**self.db_config, charset='utf8mb4')
@@ -330,7 +406,7 @@ class SimpleURLCollector:
             
         except Exception as e:
             print(f"DB 저장 오류: {str(e)}")
-            return 0
+            return None
             
         finally:
             if connection:
@@ -350,7 +426,7 @@ async def main():
     collector = SimpleURLCollector(db_config)
     
     # 도림동 매물 URL 수집
-    list_page_url = 'https://www.peterpanz.com/onetworoom?zoomLevel=13&center=%7B"y":37.5457364,"_lat":37.5457364,"x":126.9586473,"_lng":126.9586473%7D&dong=&gungu=&filter=latitude:37.4898445~37.6015864%7C%7Clongitude:126.9397646~127.0736604%7C%7CcheckMonth:999~999%7C%7CcontractType;%5B"월세"%5D%7C%7CroomCount_etc;%5B"6층~9층","1층","2층~5층","10층%20이상","반지층/지하","옥탑"%5D%7C%7CisManagerFee;%5B"add"%5D%7C%7CbuildingType;%5B"원/투룸"%5D&'
+    list_page_url = DEFAULT_LIST_PAGE_URL
     
     try:
         # URL 수집 실행
@@ -0,0 +1,217 @@
+"""
+room 스냅샷 컬럼 파일 내보내기 + 시세 집계
+- room 테이블을 스트리밍으로 읽어 컬럼 파일로 저장
+  (pyarrow 가 있으면 exports/room.parquet, 없으면 exports/room_npy/<컬럼>.npy → np.load(mmap_mode='r'))
+- 지역(구 동) × 거래방식 × 건물형태 별로 개수, 보증금/월세/관리비/㎡당 가격의 p25/중앙값/p75 를
+  NumPy 로 한 번에 계산해서 room_market_summary 테이블에 저장
+- jsontodb2.main() 이 적재 후 호출, 단독 실행도 가능: python market_export.py
+"""
+import os, re, json
+import numpy as np
+import pymysql
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXPORT_DIR = "exports"
+
+NUMERIC_COLUMNS = ["id", "deposit", "rent", "management_fee", "exclusive_area", "latitude", "longitude"]
+TEXT_COLUMNS = ["property_url", "transaction_type", "building_type", "room_living_type", "floor_info", "property_address"]
+
+SUMMARY_METRICS = ["deposit", "rent", "management_fee", "price_per_m2"]
+QUANTILES = (0.25, 0.5, 0.75)
+
+GU_RE = re.compile(r'\S+[구군]$')
+DONG_RE = re.compile(r'\S+?[동가읍면리]$')
+
+
+def area_of(address):
+    """'서울특별시 영등포구 도림동 123-4' → '영등포구 도림동'"""
+    if not address:
+        return ''
+    tokens = address.split()
+    for i, token in enumerate(tokens):
+        if GU_RE.match(token):
+            if i + 1 < len(tokens) and DONG_RE.match(tokens[i + 1]):
+                return f"{token} {tokens[i + 1]}"
+            return token
+    return ''
+
+
+def read_room_columns(db_config, batch_size=5000):
+    """room 을 서버 사이드 커서로 읽어서 {컬럼: 리스트}"""
+    columns = NUMERIC_COLUMNS + TEXT_COLUMNS
+    data = {col: [] for col in columns}
+    conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True,
+                           cursorclass=pymysql.cursors.SSCursor)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(columns)} FROM room")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                for col, value in zip(columns, row):
+                    data[col].append(value)
+    finally:
+        conn.close()
+    return data
+
+
+def to_arrays(data):
+    """파이썬 리스트 → NumPy 배열 (숫자는 float64 + NaN, 문자열은 고정폭 유니코드)"""
+    arrays = {}
+    for col in NUMERIC_COLUMNS:
+        arrays[col] = np.array([np.nan if v is None else v for v in data[col]], dtype=np.float64)
+    arrays["id"] = arrays["id"].astype(np.int64)
+    for col in TEXT_COLUMNS:
+        arrays[col] = np.array(["" if v is None else v for v in data[col]], dtype=str)
+    arrays["area"] = np.array([area_of(a) for a in data["property_address"]], dtype=str)
+    return arrays
+
+
+def write_snapshot(arrays, export_dir=EXPORT_DIR):
+    """컬럼 파일로 저장 (임시 파일에 쓰고 바꿔치기해서 읽는 쪽이 반쯤 쓴 파일을 보지 않게)"""
+    os.makedirs(export_dir, exist_ok=True)
+    if pa is not None:
+        path = os.path.join(export_dir, "room.parquet")
+        table = pa.table({col: arr for col, arr in arrays.items()})
+        pq.write_table(table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+        return path
+
+    path = os.path.join(export_dir, "room_npy")
+    os.makedirs(path, exist_ok=True)
+    for col, arr in arrays.items():
+        # np.save 는 확장자를 붙이므로 임시 파일도 .npy 로 끝나게
+        tmp = os.path.join(path, f"{col}.tmp.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, os.path.join(path, f"{col}.npy"))
+    with open(os.path.join(path, "columns.json"), "w", encoding="utf-8") as f:
+        json.dump(list(arrays), f)
+    return path
+
+
+def price_per_m2(arrays):
+    """
+    ㎡당 가격: 전세는 보증금/면적, 나머지는 (월세+관리비)/면적
+    면적이 없거나 0이면 NaN
+    """
+    area = arrays["exclusive_area"]
+    monthly = arrays["rent"] + np.nan_to_num(arrays["management_fee"])
+    value = np.where(arrays["transaction_type"] == "전세", arrays["deposit"], monthly)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(area > 0, value / area, np.nan)
+
+
+def group_quantiles(groups, values, n_groups, quantiles=QUANTILES):
+    """
+    그룹별 분위수를 반복문 없이 계산
+    (그룹, 값) 으로 정렬 → 그룹마다 NaN 아닌 값 개수로 위치를 구해서 선형 보간
+    Returns: (n_groups, len(quantiles)) 배열, 값이 없는 그룹은 NaN
+    """
+    valid = ~np.isnan(values)
+    g = groups[valid]
+    v = values[valid]
+    order = np.lexsort((v, g))
+    v_sorted = v[order]
+
+    counts = np.bincount(g, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    has = counts > 0
+    for j, q in enumerate(quantiles):
+        pos = (counts[has] - 1) * q
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        frac = pos - lo
+        base = starts[has]
+        result[has, j] = v_sorted[base + lo] * (1 - frac) + v_sorted[base + hi] * frac
+    return result
+
+
+def compute_summary(arrays):
+    """지역 × 거래방식 × 건물형태 별 집계 → dict 리스트"""
+    if len(arrays["id"]) == 0:
+        return []
+
+    keys = np.stack([arrays["area"], arrays["transaction_type"], arrays["building_type"]], axis=1)
+    unique_keys, groups = np.unique(keys, axis=0, return_inverse=True)
+    groups = groups.ravel()
+    n_groups = len(unique_keys)
+    counts = np.bincount(groups, minlength=n_groups)
+
+    metrics = {
+        "deposit": arrays["deposit"],
+        "rent": arrays["rent"],
+        "management_fee": arrays["management_fee"],
+        "price_per_m2": price_per_m2(arrays),
+    }
+    stats = {name: group_quantiles(groups, values, n_groups) for name, values in metrics.items()}
+
+    summary = []
+    for i, (area, transaction_type, room_type) in enumerate(unique_keys):
+        row = {
+            "area": str(area),
+            "transaction_type": str(transaction_type),
+            "room_type": str(room_type),
+            "listing_count": int(counts[i]),
+        }
+        for name in SUMMARY_METRICS:
+            p25, median, p75 = stats[name][i]
+            for label, value in (("p25", p25), ("median", median), ("p75", p75)):
+                row[f"{name}_{label}"] = None if np.isnan(value) else round(float(value), 2)
+        summary.append(row)
+    return summary
+
+
+def save_summary(db_config, summary):
+    """room_market_summary 를 통째로 교체 (한 트랜잭션)"""
+    columns = ["area", "transaction_type", "room_type", "listing_count"] + [
+        f"{name}_{label}" for name in SUMMARY_METRICS for label in ("p25", "median", "p75")
+    ]
+    conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True, autocommit=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM room_market_summary")
+        if summary:
+            cursor.executemany(
+                f"INSERT INTO room_market_summary ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                [[row[col] for col in columns] for row in summary]
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def export_snapshot(db_config, export_dir=EXPORT_DIR):
+    """room 스냅샷 저장 + 시세 집계 갱신"""
+    arrays = to_arrays(read_room_columns(db_config))
+    path = write_snapshot(arrays, export_dir)
+    summary = compute_summary(arrays)
+    save_summary(db_config, summary)
+    print(f"✅ 스냅샷 {len(arrays['id'])}건 → {path}, 시세 집계 {len(summary)}개 그룹")
+    return path, summary
+
+
+def main():
+    db_config = {
+        'host': 'localhost',
+        'port': 3310,
+        'user': 'root',
+        'password': '1234',
+        'database': 'bangu'
+    }
+    export_snapshot(db_config)
+
+
+if __name__ == "__main__":
+    main()
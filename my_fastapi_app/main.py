@@ -1,23 +1,167 @@
 # main.py
 
-from fastapi import FastAPI, Request
+import csv, io, itertools, json, os, sys, time, zlib
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
 
 # models.py에서 DataManager 클래스를 임포트
 from models import DataManager
 
+# 유사 매물 인덱스는 상위 폴더의 similar_index.py 가 만든다
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from similar_index import INDEX_PATH, SimilarIndex
+
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
 data_manager = DataManager()
+similar_index = None
+
+
+def room_filters(
+    transaction_type: str = None,
+    min_deposit: int = None,
+    max_deposit: int = None,
+    min_rent: int = None,
+    max_rent: int = None,
+    min_area: float = None,
+    max_area: float = None,
+    address: str = None,
+):
+    """목록 화면과 내보내기가 같이 쓰는 매물 필터"""
+    return {
+        "transaction_type": transaction_type,
+        "min_deposit": min_deposit,
+        "max_deposit": max_deposit,
+        "min_rent": min_rent,
+        "max_rent": max_rent,
+        "min_area": min_area,
+        "max_area": max_area,
+        "address": address,
+    }
 
 @app.get("/")
-def get_items_page(request: Request):
+def get_items_page(request: Request, filters: dict = Depends(room_filters)):
     """
     사용자 요청을 받아 데이터를 가져와 화면에 표시하는 컨트롤러
     """
     # 1. 모델에서 데이터를 가져옵니다.
-    items = data_manager.get_all_items()
+    items = data_manager.get_all_items(filters)
     
     # 2. 뷰에 데이터를 전달해 화면을 렌더링합니다.
     return templates.TemplateResponse("detail.html", {"request": request, "items": items})
-    #templates.TemplateResponse("items.html", {"request": request, "items": items})
\ No newline at end of file
+    #templates.TemplateResponse("items.html", {"request": request, "items": items})
+
+
+@app.get("/api/market-summary")
+def get_market_summary(area: str = None, transaction_type: str = None, room_type: str = None):
+    """
+    지역 × 거래방식 × 건물형태 별 시세 집계 (JSON)
+    jsontodb2 적재 후 market_export.py 가 갱신한 값을 그대로 돌려준다
+    """
+    return data_manager.get_market_summary(area, transaction_type, room_type)
+
+
+def encode_ndjson(chunks):
+    for rows in chunks:
+        yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows).encode("utf-8")
+
+
+def encode_csv(chunks):
+    header_written = False
+    for rows in chunks:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if not header_written:
+            # 엑셀에서 한글이 깨지지 않게 BOM
+            buf.write("\ufeff")
+            writer.writerow(rows[0].keys())
+            header_written = True
+        writer.writerows(row.values() for row in rows)
+        yield buf.getvalue().encode("utf-8")
+
+
+def gzip_stream(blocks):
+    """블록 단위로 바로바로 gzip 압축해서 흘려보내기"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.get("/export")
+def export_items(
+    request: Request,
+    filters: dict = Depends(room_filters),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    after_id: int = None,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+):
+    """
+    매물 대량 내보내기 (NDJSON / CSV 스트리밍)
+    - 목록 화면과 같은 필터 사용, id 순서로 내보냄
+    - 중간에 끊기면 마지막으로 받은 id 를 after_id 로 넘겨서 이어받기
+    - Accept-Encoding 에 gzip 이 있으면 압축해서 보냄
+    """
+    chunks = data_manager.iter_items(filters, after_id=after_id, chunk_size=chunk_size)
+    try:
+        # 연결과 첫 조회는 응답을 시작하기 전에 (DB 가 안 되면 빈 200 대신 503)
+        first = next(chunks, None)
+    except ConnectionError:
+        raise HTTPException(status_code=503, detail="DB 에 연결할 수 없습니다")
+    chunks = itertools.chain([first] if first else [], chunks)
+    if format == "csv":
+        body = encode_csv(chunks)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        body = encode_ndjson(chunks)
+        media_type = "application/x-ndjson"
+
+    headers = {"Content-Disposition": f'attachment; filename="rooms.{format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def get_similar_index():
+    """인덱스 파일이 바뀌었으면 (적재 후 갱신) 다시 불러오기"""
+    global similar_index
+    try:
+        mtime = os.path.getmtime(INDEX_PATH)
+    except OSError:
+        return None
+    if similar_index is None or similar_index.mtime != mtime:
+        similar_index = SimilarIndex.load(INDEX_PATH)
+    return similar_index
+
+
+@app.get("/room/{room_id}/similar")
+def get_similar_rooms(
+    room_id: int,
+    k: int = Query(10, ge=1, le=100),
+    radius_km: float = Query(None, gt=0),
+):
+    """
+    비슷한 매물 top-k (같은 거래방식끼리, 가격/면적/층/위치/옵션 기준)
+    - radius_km 를 주면 그 반경 박스 안에서만 찾는다
+    - 거리 계산은 메모리에 올린 NumPy 인덱스로, DB 는 결과 k 건 조회에만 사용
+    """
+    index = get_similar_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="유사 매물 인덱스가 아직 없습니다 (python similar_index.py)")
+
+    started = time.perf_counter()
+    neighbours = index.top_k(room_id, k=k, radius_km=radius_km)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if neighbours is None:
+        raise HTTPException(status_code=404, detail="인덱스에 없는 매물입니다")
+
+    rooms = {row["id"]: row for row in data_manager.get_rooms_by_ids([i for i, _ in neighbours])}
+    items = [dict(rooms.get(i, {"id": i}), distance=round(d, 4)) for i, d in neighbours]
+    return {"room_id": room_id, "search_ms": round(elapsed_ms, 3), "items": items}
@@ -7,6 +7,40 @@ DB_PASSWORD = "1234"
 DB_NAME = "bangu"
 DB_PORT = 3310
 
+# 목록 화면과 대량 내보내기가 같이 보는 매물 테이블
+ROOM_TABLE = "room2"
+
+# 필터 이름 → (컬럼, 비교 연산자)
+ROOM_FILTERS = {
+    "transaction_type": ("transaction_type", "="),
+    "min_deposit": ("deposit", ">="),
+    "max_deposit": ("deposit", "<="),
+    "min_rent": ("rent", ">="),
+    "max_rent": ("rent", "<="),
+    "min_area": ("exclusive_area", ">="),
+    "max_area": ("exclusive_area", "<="),
+    "address": ("property_address", "LIKE"),
+}
+
+
+def build_where(filters, after_id=None):
+    """필터 dict → (WHERE 절, 파라미터). 값이 None 인 필터는 무시"""
+    conditions = []
+    params = []
+    for name, value in (filters or {}).items():
+        if value is None or name not in ROOM_FILTERS:
+            continue
+        column, op = ROOM_FILTERS[name]
+        if op == "LIKE":
+            value = f"%{value}%"
+        conditions.append(f"{column} {op} %s")
+        params.append(value)
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
  
 class DataManager:
     """데이터베이스와 상호작용하는 모델 클래스"""
@@ -25,15 +59,16 @@ class DataManager:
             print(f"DB 연결 오류: {err}")
             return None
 
-    def get_all_items(self):
+    def get_all_items(self, filters=None):
         """데이터베이스에서 모든 항목을 가져오는 함수"""
         conn = self.get_db_connection()
         if not conn:
             return []
         
+        where, params = build_where(filters)
         cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute("SELECT * FROM room2")
+            cursor.execute(f"SELECT * FROM {ROOM_TABLE} {where}", params)
             items = cursor.fetchall()
             return items
         except mysql.connector.Error as err:
@@ -41,4 +76,78 @@ class DataManager:
             return []
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+    def iter_items(self, filters=None, after_id=None, chunk_size=1000):
+        """
+        대량 내보내기용: 버퍼링 없는 서버 사이드 커서로 id 순서대로 chunk_size 개씩 yield
+        fetchall 을 하지 않으므로 테이블 크기와 상관없이 메모리는 chunk 하나 만큼만 쓴다
+        """
+        conn = self.get_db_connection()
+        if not conn:
+            # 빈 결과로 끝내면 정상적인 빈 내보내기처럼 보이니 예외로
+            raise ConnectionError("DB 연결 실패")
+
+        where, params = build_where(filters, after_id)
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            try:
+                # 도중에 난 DB 오류는 그대로 올려서 응답을 끊는다 (잘린 파일이 정상처럼 보이지 않게)
+                cursor.execute(f"SELECT * FROM {ROOM_TABLE} {where} ORDER BY id", params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                try:
+                    cursor.close()
+                except mysql.connector.Error:
+                    # 클라이언트가 중간에 끊으면 읽지 않은 행이 남아 "Unread result found" — 연결째 닫으면 된다
+                    pass
+        finally:
+            conn.close()
+
+    def get_market_summary(self, area=None, transaction_type=None, room_type=None):
+        """미리 계산해 둔 시세 집계(room_market_summary) 조회 — room 테이블은 건드리지 않음"""
+        conn = self.get_db_connection()
+        if not conn:
+            return []
+
+        conditions = []
+        params = []
+        for column, value in (("area", area), ("transaction_type", transaction_type), ("room_type", room_type)):
+            if value:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"SELECT * FROM room_market_summary {where} ORDER BY area, transaction_type, room_type", params)
+            return cursor.fetchall()
+        except mysql.connector.Error as err:
+            print(f"쿼리 실행 오류: {err}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_rooms_by_ids(self, ids):
+        """유사 매물 결과용: room 에서 id 목록 조회 (PK 조회라 몇 건이면 금방)"""
+        if not ids:
+            return []
+        conn = self.get_db_connection()
+        if not conn:
+            return []
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"SELECT * FROM room WHERE id IN ({', '.join(['%s'] * len(ids))})", list(ids))
+            return cursor.fetchall()
+        except mysql.connector.Error as err:
+            print(f"쿼리 실행 오류: {err}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
@@ -1,13 +1,20 @@
-from playwright.sync_api import sync_playwright
-import time, json, requests, os, traceback
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import time, json, os, threading, traceback
 import pymysql
+from fast_detail import FETCH_STATS, fetch_room_info_fast, download_images
+from asset_cache import install_asset_cache
+from scheduler import claim_due_urls, release_claimed_urls, requeue_stale, mark_completed, mark_failed
 
 
 def get_pending_urls(db_config, limit=20):
-    """DB에서 target_urls 테이블의 pending URL 불러오기"""
+    """DB에서 target_urls 테이블의 처리할 차례인 pending URL 불러오기 (scheduler 우선순위 순)"""
     conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True)
     cursor = conn.cursor(pymysql.cursors.DictCursor)
-    cursor.execute("SELECT id, property_url FROM target_urls WHERE status='pending' ORDER BY created_at ASC LIMIT %s", (limit,))
+    cursor.execute(
+        "SELECT id, property_url FROM target_urls WHERE status='pending' AND next_attempt_at <= NOW() "
+        "ORDER BY priority DESC, next_attempt_at ASC LIMIT %s",
+        (limit,)
+    )
     results = cursor.fetchall()
     conn.close()
     return results
@@ -22,15 +29,27 @@ def update_url_status(db_config, url_id, status):
     conn.close()
 
 
-def scrape_peterpan_room_info(url: str, base_dir: str):
+def browser_error_cause(e):
+    """브라우저 예외 → 실패 원인 ('timeout', 'network'), 그 외는 None"""
+    if isinstance(e, PlaywrightTimeoutError):
+        return 'timeout'
+    if 'net::ERR_' in str(e):
+        return 'network'
+    return None
+
+
+def scrape_peterpan_room_info(url: str, base_dir: str, settle_seconds: float = 5):
     """
-    매물 상세 정보 + 이미지 스크래핑 → JSON 반환
+    매물 상세 정보 + 이미지 스크래핑
+    Returns: (room_info, property_id, 브라우저 실패 원인 'timeout'/'network' 또는 None)
     """
     room_info = {}
     property_id = None
+    cause = None
 
     with sync_playwright() as p:
         browser = None
+        asset_cache = None
         try:
             browser = p.chromium.launch(
                 headless=True,
@@ -39,11 +58,13 @@ def scrape_peterpan_room_info(url: str, base_dir: str):
             context = browser.new_context(
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             )
+            # JS/CSS/폰트는 워커끼리 공유하는 디스크 캐시에서
+            asset_cache = install_asset_cache(context)
             page = context.new_page()
 
             print(f"\n➡️ {url} 접속 중...")
             page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            time.sleep(5)
+            time.sleep(settle_seconds)
 
             # 매물 번호
             try:
@@ -98,28 +119,95 @@ def scrape_peterpan_room_info(url: str, base_dir: str):
             photo_urls = [img.get_attribute('src') for img in img_elements if img.get_attribute('src')]
 
             if property_id:
-                img_folder = os.path.join(base_dir, "img")
-                os.makedirs(img_folder, exist_ok=True)
-
-                for i, img_url in enumerate(photo_urls, 1):
-                    try:
-                        r = requests.get(img_url, timeout=10)
-                        if r.status_code == 200:
-                            filename = os.path.join(img_folder, f"{property_id}_{i}.jpg")
-                            with open(filename, 'wb') as f:
-                                f.write(r.content)
-                    except:
-                        continue
+                download_images(photo_urls, property_id, base_dir)
 
         except Exception as e:
+            cause = browser_error_cause(e)
             print(f"❌ 오류: {e}")
             print(traceback.format_exc())
         finally:
             if browser:
                 browser.close()
+            if asset_cache:
+                print(f"📦 정적 리소스 캐시: {asset_cache.summary()}")
+                asset_cache.flush_stats()
 
     room_info['property_url'] = url
-    return room_info, property_id
+    return room_info, property_id, cause
+
+
+def fetch_room_info(url: str, base_dir: str, settle_seconds: float = 5):
+    """
+    HTTP 빠른 경로 먼저 시도 → 필수 항목이 빠졌을 때만 브라우저로 재수집
+    Returns: (room_info, property_id, 실패 원인 또는 None)
+    """
+    room_info, property_id, missing, error = fetch_room_info_fast(url, base_dir)
+    if not missing:
+        FETCH_STATS.record('fast')
+        return room_info, property_id, None
+    if error == 'gone':
+        # 내려간 매물은 브라우저로 다시 볼 필요 없음
+        FETCH_STATS.record('failed', missing)
+        return room_info, None, error
+
+    print(f"↪️ 빠른 경로 누락 {missing} → 브라우저로 재시도")
+    room_info, property_id, browser_cause = scrape_peterpan_room_info(url, base_dir, settle_seconds)
+    if property_id:
+        FETCH_STATS.record('fallback', missing)
+        return room_info, property_id, None
+    FETCH_STATS.record('failed', missing)
+    # 브라우저가 시간 초과/네트워크 오류로 실패했으면 그 원인으로 (재시도 한도가 원인별로 다르다)
+    # 페이지는 열렸는데 매물 번호가 없으면 파싱 문제로 본다
+    return room_info, None, browser_cause or error or 'parse'
+
+
+def process_url(db_config, url_data, base_dir):
+    """URL 하나 수집 → JSON 저장 → 스케줄 갱신. 성공하면 매물 번호 반환"""
+    url_id = url_data['id']
+    url = url_data['property_url']
+
+    data, pid, cause = fetch_room_info(url, base_dir)
+
+    if not pid:
+        status = mark_failed(db_config, url_id, cause)
+        print(f"❌ 수집 실패 ({cause}) → {status}: {url}")
+        return None
+
+    # JSON 저장
+    info_dir = os.path.join(base_dir, "info")
+    os.makedirs(info_dir, exist_ok=True)
+    file_path = os.path.join(info_dir, f"{pid}.json")
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    mark_completed(db_config, url_id)
+    print(f"✅ JSON 저장 완료: {file_path}")
+    return pid
+
+
+def run_worker(db_config, worker_id, base_dir="scraped_data", batch_size=5, delay=20, idle_seconds=30, stop_event=None):
+    """
+    supervisor.py 가 띄우는 워커 루프
+    - batch_size 만큼 선점해서 하나씩 처리, stop_event 가 켜지면 지금 행만 마치고 종료
+    - 종료할 때 손대지 않은 선점 행은 pending 으로 반납
+    """
+    stop_event = stop_event or threading.Event()
+    print(f"🚀 워커 {worker_id} 시작 (pid={os.getpid()})")
+    try:
+        while not stop_event.is_set():
+            urls = claim_due_urls(db_config, worker_id, limit=batch_size)
+            if not urls:
+                stop_event.wait(idle_seconds)
+                continue
+
+            for url_data in urls:
+                if stop_event.is_set():
+                    break
+                if process_url(db_config, url_data, base_dir):
+                    stop_event.wait(delay)
+    finally:
+        released = release_claimed_urls(db_config, worker_id)
+        print(f"🛑 워커 {worker_id} 종료 (반납 {released}건) — {FETCH_STATS.summary()}")
 
 
 def main():
@@ -136,31 +224,19 @@ def main():
     info_dir = os.path.join(base_dir, "info")
     os.makedirs(info_dir, exist_ok=True)
 
-    # DB에서 URL 불러오기
+    # DB에서 URL 불러오기 (재수집 시기가 된 매물도 대기열로)
+    requeue_stale(db_config)
     urls = get_pending_urls(db_config, limit=50)
     if not urls:
         print("⚠️ 처리할 URL이 없습니다.")
         return
 
     for url_data in urls:
-        url_id = url_data['id']
-        url = url_data['property_url']
-
-        update_url_status(db_config, url_id, "processing")
-        data, pid = scrape_peterpan_room_info(url, base_dir)
-
-        if not pid:
-            update_url_status(db_config, url_id, "failed")
-            continue
-
-        # JSON 저장
-        file_path = os.path.join(info_dir, f"{pid}.json")
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        update_url_status(db_config, url_data['id'], "processing")
+        if process_url(db_config, url_data, base_dir):
+            time.sleep(20)
 
-        update_url_status(db_config, url_id, "completed")
-        print(f"✅ JSON 저장 완료: {file_path}")
-        time.sleep(20)
+    print(f"📊 {FETCH_STATS.summary()}")
 
 
 if __name__ == "__main__":
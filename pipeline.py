@@ -0,0 +1,144 @@
+"""
+리스트 수집 → 상세 수집 → DB 적재를 한 번에 돌리는 모드
+- SimpleURLCollector 가 스크롤하면서 새 매물 ID를 발견하는 즉시 asyncio.Queue 에 넣는다
+  (target_urls 에는 먼저 저장하므로 중간에 죽어도 peterdb/supervisor 가 이어서 처리)
+- 상세 워커 N개가 queue 에서 꺼내 선점 → 상세 수집 → JSON 저장 → room 적재까지 바로 처리
+- 끝나면 적재한 파일을 load manifest 에 기록하고 jsontodb2 와 같은 후처리(스냅샷/시세 집계/유사 매물 인덱스)를 돌린다
+- queue 크기를 넘으면 put 이 기다리므로 스크롤도 상세 수집 속도에 맞춰 느려진다 (back-pressure)
+
+예) python pipeline.py --workers 4 --queue-size 20
+"""
+import argparse, asyncio, os, socket
+
+from list import SimpleURLCollector, DEFAULT_LIST_PAGE_URL
+from peterdb import process_url
+from jsontodb2 import insert_room_and_images, record_loaded, after_load
+from scheduler import claim_url, release_claimed_urls
+from seen_set import house_url
+
+
+async def detail_worker(name, queue, db_config, base_dir, base_url, delay, stats):
+    """queue 에서 매물 ID를 꺼내 상세 수집 + room 적재 (브라우저/DB 작업은 스레드에서)"""
+    worker_id = f"{socket.gethostname()}-{name}"
+    try:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                house_id, discovered_at = item
+                url = house_url(house_id, base_url)
+
+                try:
+                    row = await asyncio.to_thread(claim_url, db_config, url, worker_id)
+                    if not row:
+                        # supervisor 워커가 먼저 가져갔거나 이미 처리됨
+                        stats["skipped"] += 1
+                        continue
+
+                    pid = await asyncio.to_thread(process_url, db_config, row, base_dir)
+                    if not pid:
+                        stats["failed"] += 1
+                        continue
+
+                    json_file = os.path.join(base_dir, "info", f"{pid}.json")
+                    room_id = await asyncio.to_thread(
+                        insert_room_and_images, db_config, json_file, os.path.join(base_dir, "img")
+                    )
+                except Exception as e:
+                    # 워커 하나가 죽으면 queue 가 막히므로 로그만 남기고 계속
+                    stats["failed"] += 1
+                    print(f"❌ [{name}] {house_id} 처리 오류: {e}")
+                    continue
+                if not room_id:
+                    stats["failed"] += 1
+                    continue
+
+                stats["loaded"] += 1
+                stats["loaded_files"].append((json_file, room_id))
+                print(f"⚡ [{name}] {house_id} → room_id={room_id} (발견 후 {asyncio.get_running_loop().time() - discovered_at:.1f}초)")
+                await asyncio.sleep(delay)
+            finally:
+                queue.task_done()
+    finally:
+        await asyncio.to_thread(release_claimed_urls, db_config, worker_id)
+
+
+def finish_loaded(db_config, base_dir, loaded_files):
+    """적재한 파일을 manifest 에 기록 (다음 jsontodb2 가 다시 올리지 않게) + 적재 후처리"""
+    try:
+        record_loaded(loaded_files, os.path.join(base_dir, "img"), os.path.join(base_dir, "load_manifest.json"))
+    except Exception as e:
+        print(f"❌ manifest 기록 실패: {e}")
+    after_load(db_config, [room_id for _, room_id in loaded_files])
+
+
+async def run_pipeline(db_config, list_page_url, area_name, workers=4, queue_size=20,
+                       max_items=1000, scroll_seconds=60, delay=5, base_dir="scraped_data",
+                       base_url="https://www.peterpanz.com"):
+    queue = asyncio.Queue(maxsize=queue_size)
+    stats = {"loaded": 0, "failed": 0, "skipped": 0, "loaded_files": []}
+    collector = SimpleURLCollector(db_config, base_url=base_url)
+
+    consumers = [
+        asyncio.create_task(detail_worker(f"d{i}", queue, db_config, base_dir, base_url, delay, stats))
+        for i in range(workers)
+    ]
+    try:
+        await collector.collect_urls(
+            list_page_url=list_page_url,
+            area_name=area_name,
+            max_items=max_items,
+            scroll_seconds=scroll_seconds,
+            queue=queue
+        )
+        # 수집이 끝나면 워커 수만큼 종료 신호
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+    finally:
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+        # 중간에 멈춰도 적재한 것까지는 manifest/인덱스에 반영
+        if stats["loaded_files"]:
+            await asyncio.to_thread(finish_loaded, db_config, base_dir, stats["loaded_files"])
+
+    print(f"\n=== 완료: 적재 {stats['loaded']}건, 실패 {stats['failed']}건, 건너뜀 {stats['skipped']}건 ===")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="리스트 → 상세 → DB 동시 실행")
+    parser.add_argument("--workers", type=int, default=4, help="상세 수집 동시 실행 수")
+    parser.add_argument("--queue-size", type=int, default=20)
+    parser.add_argument("--max-items", type=int, default=1000)
+    parser.add_argument("--scroll-seconds", type=float, default=60)
+    parser.add_argument("--delay", type=float, default=5, help="워커별 매물 사이 대기 (초)")
+    parser.add_argument("--area", default="도림동")
+    parser.add_argument("--list-url", default=DEFAULT_LIST_PAGE_URL)
+    args = parser.parse_args()
+
+    # DB 연결 설정
+    db_config = {
+        'host': 'localhost',
+        'port': 3310,
+        'user': 'root',
+        'password': '1234',
+        'database': 'bangu'
+    }
+
+    asyncio.run(run_pipeline(
+        db_config,
+        list_page_url=args.list_url,
+        area_name=args.area,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        max_items=args.max_items,
+        scroll_seconds=args.scroll_seconds,
+        delay=args.delay,
+    ))
+
+
+if __name__ == "__main__":
+    main()
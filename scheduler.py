@@ -0,0 +1,177 @@
+"""
+target_urls 수집 스케줄러
+- 우선순위: 새로 발견한 매물(100) > 재시도(50) > 오래된 매물 재수집(10)
+- 완료한 매물은 등록된 지 오래될수록 드물게 재수집 (나이의 1/4, 1일~14일)
+- 실패는 원인별로 분류해서 지수 백오프로 재시도, 한도를 넘기면 'failed'
+- 조회는 전부 (status, next_attempt_at, priority) 인덱스를 탄다
+"""
+import random
+
+import pymysql
+
+PRIORITY_NEW = 100
+PRIORITY_RETRY = 50
+PRIORITY_RECRAWL = 10
+
+# 재수집 간격 = 매물 나이 * RECRAWL_AGE_FACTOR, [최소, 최대] 로 자름 (초)
+RECRAWL_AGE_FACTOR = 0.25
+RECRAWL_MIN_SECONDS = 24 * 3600
+RECRAWL_MAX_SECONDS = 14 * 24 * 3600
+
+# 재시도 백오프: BASE * 2^(시도-1), 최대 MAX, ±20% 흔들기
+BACKOFF_BASE_SECONDS = 5 * 60
+BACKOFF_MAX_SECONDS = 24 * 3600
+
+# 실패 원인별 최대 시도 횟수 ('gone' 은 매물이 내려간 것이라 재시도 안 함)
+MAX_ATTEMPTS = {
+    'gone': 1,
+    'parse': 3,
+    'http_error': 6,
+    'timeout': 6,
+    'network': 6,
+}
+DEFAULT_MAX_ATTEMPTS = 4
+
+
+def _connect(db_config, **kwargs):
+    return pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True, **kwargs)
+
+
+def backoff_seconds(attempt_count):
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempt_count - 1, 0)), BACKOFF_MAX_SECONDS)
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+def requeue_stale(db_config):
+    """재수집 시기가 된 completed 행을 낮은 우선순위 pending 으로"""
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE target_urls SET status='pending', priority=%s "
+        "WHERE status='completed' AND next_attempt_at <= NOW()",
+        (PRIORITY_RECRAWL,)
+    )
+    requeued = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return requeued
+
+
+def claim_due_urls(db_config, worker_id, limit=5):
+    """
+    지금 처리할 차례인 pending 행을 우선순위 순으로 선점
+    여러 워커가 동시에 돌아도 UPDATE 한 번으로 나눠 가진다
+    """
+    requeue_stale(db_config)
+
+    conn = _connect(db_config)
+    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor.execute(
+        "UPDATE target_urls SET status='processing', claimed_by=%s "
+        "WHERE status='pending' AND next_attempt_at <= NOW() "
+        "ORDER BY priority DESC, next_attempt_at ASC LIMIT %s",
+        (worker_id, limit)
+    )
+    conn.commit()
+    cursor.execute(
+        "SELECT id, property_url, priority, attempt_count FROM target_urls "
+        "WHERE status='processing' AND claimed_by=%s ORDER BY priority DESC, next_attempt_at ASC",
+        (worker_id,)
+    )
+    results = cursor.fetchall()
+    conn.close()
+    return results
+
+
+def claim_url(db_config, property_url, worker_id):
+    """
+    URL 하나를 바로 선점 (pipeline.py 처럼 발견 즉시 처리할 때)
+    이미 다른 워커가 가져갔으면 None
+    """
+    conn = _connect(db_config)
+    cursor = conn.cursor(pymysql.cursors.DictCursor)
+    cursor.execute(
+        "UPDATE target_urls SET status='processing', claimed_by=%s WHERE property_url=%s AND status='pending'",
+        (worker_id, property_url)
+    )
+    conn.commit()
+    row = None
+    if cursor.rowcount:
+        cursor.execute(
+            "SELECT id, property_url, priority, attempt_count FROM target_urls WHERE property_url=%s",
+            (property_url,)
+        )
+        row = cursor.fetchone()
+    conn.close()
+    return row
+
+
+def release_claimed_urls(db_config, worker_id):
+    """워커가 끝내지 못한 processing 행을 다시 pending 으로 돌려놓기"""
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE target_urls SET status='pending', claimed_by=NULL WHERE status='processing' AND claimed_by=%s",
+        (worker_id,)
+    )
+    released = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return released
+
+
+def count_due_urls(db_config):
+    """지금 처리할 차례인 pending 개수 (supervisor 스케일링 기준)"""
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM target_urls WHERE status='pending' AND next_attempt_at <= NOW()")
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+
+def mark_completed(db_config, url_id):
+    """성공: 시도 횟수 초기화 + 매물 나이에 맞춰 다음 재수집 시각 예약"""
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE target_urls SET status='completed', claimed_by=NULL, attempt_count=0, last_error=NULL, "
+        "last_crawled_at=NOW(), "
+        "next_attempt_at = NOW() + INTERVAL LEAST(GREATEST(TIMESTAMPDIFF(SECOND, created_at, NOW()) * %s, %s), %s) SECOND "
+        "WHERE id=%s",
+        (RECRAWL_AGE_FACTOR, RECRAWL_MIN_SECONDS, RECRAWL_MAX_SECONDS, url_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def mark_failed(db_config, url_id, cause):
+    """
+    실패: 원인별 한도 안이면 백오프 후 재시도, 넘으면 'failed'
+    Returns: 최종 상태 ('pending' 또는 'failed')
+    """
+    cause = cause or 'unknown'
+    conn = _connect(db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT attempt_count FROM target_urls WHERE id=%s FOR UPDATE", (url_id,))
+        row = cursor.fetchone()
+        attempts = (row[0] if row else 0) + 1
+
+        if attempts >= MAX_ATTEMPTS.get(cause, DEFAULT_MAX_ATTEMPTS):
+            status = 'failed'
+            cursor.execute(
+                "UPDATE target_urls SET status='failed', claimed_by=NULL, attempt_count=%s, last_error=%s WHERE id=%s",
+                (attempts, cause, url_id)
+            )
+        else:
+            status = 'pending'
+            cursor.execute(
+                "UPDATE target_urls SET status='pending', claimed_by=NULL, attempt_count=%s, last_error=%s, "
+                "priority=%s, next_attempt_at = NOW() + INTERVAL %s SECOND WHERE id=%s",
+                (attempts, cause, PRIORITY_RETRY, backoff_seconds(attempts), url_id)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return status
@@ -0,0 +1,107 @@
+"""
+매물 URL 정규화 + 이미 아는 매물 ID 집합
+- 어떤 형태로 발견되든(끝 슬래시, 쿼리스트링, data-* 속성 값) 매물 ID(int) 하나로 줄인다
+- 아는 ID는 정렬된 int64 배열로 들고 있다가 bisect 로 조회 (ID 하나에 8바이트)
+"""
+import re
+from array import array
+from bisect import bisect_left
+
+import pymysql
+
+# 매물 ID는 5자리 이상 숫자
+HOUSE_PATH_RE = re.compile(r'/house/(\d{5,})(?!\d)')
+HOUSE_ID_RE = re.compile(r'\d{5,}')
+
+
+def canonical_house_id(value):
+    """
+    '/house/12345/?a=1', 'https://www.peterpanz.com/house/12345#x', '12345' → 12345
+    매물로 볼 수 없으면 None
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    match = HOUSE_PATH_RE.search(value)
+    if match:
+        return int(match.group(1))
+    if HOUSE_ID_RE.fullmatch(value):
+        return int(value)
+    return None
+
+
+def house_url(house_id, base_url="https://www.peterpanz.com"):
+    """매물 ID → DB에 저장하는 정규 URL"""
+    return f"{base_url}/house/{house_id}"
+
+
+def canonical_house_ids(values):
+    """순서를 유지하면서 정규화 + 중복 제거"""
+    seen = set()
+    result = []
+    for value in values:
+        house_id = canonical_house_id(value)
+        if house_id is not None and house_id not in seen:
+            seen.add(house_id)
+            result.append(house_id)
+    return result
+
+
+class SeenSet:
+    """정렬된 int64 배열 기반의 매물 ID 집합"""
+
+    def __init__(self, ids=()):
+        self.ids = array('q', sorted(set(ids)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, house_id):
+        i = bisect_left(self.ids, house_id)
+        return i < len(self.ids) and self.ids[i] == house_id
+
+    def split(self, house_ids):
+        """(새 ID 목록, 이미 아는 ID 목록)"""
+        new, known = [], []
+        for house_id in house_ids:
+            (known if house_id in self else new).append(house_id)
+        return new, known
+
+    def add_many(self, house_ids):
+        """새 ID를 한 번에 병합 (정렬 유지)"""
+        fresh = sorted(set(h for h in house_ids if h not in self))
+        if not fresh:
+            return
+        merged = array('q')
+        i = j = 0
+        old = self.ids
+        while i < len(old) and j < len(fresh):
+            if old[i] < fresh[j]:
+                merged.append(old[i])
+                i += 1
+            else:
+                merged.append(fresh[j])
+                j += 1
+        merged.extend(old[i:])
+        merged.extend(fresh[j:])
+        self.ids = merged
+
+
+def load_seen_set(db_config, batch_size=10000):
+    """target_urls 에 있는 매물 ID를 스트리밍으로 읽어서 SeenSet 생성"""
+    ids = array('q')
+    conn = pymysql.connect(**db_config, charset='utf8mb4', cursorclass=pymysql.cursors.SSCursor)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT property_url FROM target_urls")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (property_url,) in rows:
+                house_id = canonical_house_id(property_url)
+                if house_id is not None:
+                    ids.append(house_id)
+    finally:
+        conn.close()
+    return SeenSet(ids)
@@ -0,0 +1,325 @@
+"""
+비슷한 매물 추천용 NumPy 인덱스
+- room 의 보증금/월세/관리비/전용면적/층/위도/경도 → 정규화한 float32 행렬
+  (금액·면적은 log1p 후 중앙값/IQR 로 스케일, 좌표는 km 단위)
+- 추가옵션은 옵션 사전 기준 uint64 비트셋, 거리 = 숫자 특징 유클리드² + 옵션 자카드 거리
+- 같은 거래방식끼리만 비교, radius_km 를 주면 좌표 박스로 먼저 거른다
+- exports/similar_index.npz 에 저장, jsontodb2 적재 후 바뀐 room_id 만 갱신
+"""
+import os, re
+import numpy as np
+import pymysql
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports", "similar_index.npz")
+
+# (컬럼, log 변환 여부, 가중치)
+FEATURES = [
+    ("deposit", True, 1.0),
+    ("rent", True, 1.5),
+    ("management_fee", True, 0.5),
+    ("exclusive_area", True, 1.0),
+    ("floor", False, 0.3),
+]
+# 좌표는 km 로 바꿔서 이 값으로 나눈다 (LOCATION_SCALE_KM 떨어지면 거리 1)
+LOCATION_SCALE_KM = 1.0
+OPTION_WEIGHT = 1.0
+MAX_OPTIONS = 64
+KM_PER_DEG_LAT = 111.0
+
+COLUMNS = ["id", "transaction_type", "deposit", "rent", "management_fee", "exclusive_area",
+           "floor_info", "latitude", "longitude", "additional_options"]
+
+# 바이트 하나당 켜진 비트 수 (np.bitwise_count 가 없는 NumPy 용)
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(bits):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return POPCOUNT_TABLE[bits.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int32)
+
+
+def parse_floor(floor_info):
+    """'2층/5층' → 2, '반지하/3층' → -0.5, '옥탑/5층' → 6, 모르면 None"""
+    if not floor_info:
+        return None
+    current = floor_info.split("/")[0]
+    if "반지" in current:
+        return -0.5
+    if "지하" in current:
+        return -1
+    if "옥탑" in current:
+        total = re.search(r"(\d+)", floor_info.split("/")[-1])
+        return int(total.group(1)) + 1 if total else None
+    match = re.search(r"(-?\d+)", current)
+    return int(match.group(1)) if match else None
+
+
+def split_options(text):
+    return [o.strip() for o in (text or "").split(",") if o.strip()]
+
+
+def read_rooms(db_config, room_ids=None, batch_size=5000):
+    """room 행 읽기 (room_ids 가 있으면 그 행만)"""
+    conn = pymysql.connect(**db_config, charset="utf8mb4", use_unicode=True,
+                           cursorclass=pymysql.cursors.SSDictCursor)
+    rows = []
+    try:
+        cursor = conn.cursor()
+        sql = f"SELECT {', '.join(COLUMNS)} FROM room"
+        if room_ids is not None:
+            if not room_ids:
+                return []
+            cursor.execute(f"{sql} WHERE id IN ({', '.join(['%s'] * len(room_ids))})", list(room_ids))
+        else:
+            cursor.execute(sql)
+        while True:
+            chunk = cursor.fetchmany(batch_size)
+            if not chunk:
+                break
+            rows.extend(chunk)
+    finally:
+        conn.close()
+    return rows
+
+
+class SimilarIndex:
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, len(FEATURES) + 2), dtype=np.float32)
+        self.bits = np.zeros(0, dtype=np.uint64)
+        self.tx = np.zeros(0, dtype=np.int8)
+        self.lat = np.zeros(0, dtype=np.float32)
+        self.lon = np.zeros(0, dtype=np.float32)
+        self.center = np.zeros(len(FEATURES))
+        self.scale = np.ones(len(FEATURES))
+        self.origin = np.zeros(2)
+        self.vocab = []
+        self.tx_types = []
+        self.mtime = None
+        self._norms = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- 특징 계산 ---
+
+    def raw_features(self, rows):
+        raw = np.full((len(rows), len(FEATURES)), np.nan)
+        for i, row in enumerate(rows):
+            for j, (col, use_log, _) in enumerate(FEATURES):
+                value = parse_floor(row["floor_info"]) if col == "floor" else row[col]
+                if value is not None:
+                    raw[i, j] = np.log1p(max(float(value), 0)) if use_log else float(value)
+        return raw
+
+    def fit(self, rows):
+        """전체 재빌드: 스케일/좌표 원점/옵션 사전/거래방식 목록을 새로 정한다"""
+        raw = self.raw_features(rows)
+        self.center = np.nan_to_num(np.nanmedian(raw, axis=0)) if len(rows) else np.zeros(len(FEATURES))
+        if len(rows):
+            q75, q25 = np.nanpercentile(raw, 75, axis=0), np.nanpercentile(raw, 25, axis=0)
+            iqr = np.nan_to_num(q75 - q25)
+        else:
+            iqr = np.ones(len(FEATURES))
+        self.scale = np.where(iqr > 0, iqr, 1.0)
+
+        lats = [r["latitude"] for r in rows if r["latitude"] is not None]
+        lons = [r["longitude"] for r in rows if r["longitude"] is not None]
+        self.origin = np.array([np.median(lats) if lats else 0.0, np.median(lons) if lons else 0.0])
+
+        counts = {}
+        for row in rows:
+            for option in split_options(row["additional_options"]):
+                counts[option] = counts.get(option, 0) + 1
+        self.vocab = sorted(counts, key=lambda o: -counts[o])[:MAX_OPTIONS]
+        self.tx_types = sorted({row["transaction_type"] or "" for row in rows})
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, len(FEATURES) + 2), dtype=np.float32)
+        self.bits = np.zeros(0, dtype=np.uint64)
+        self.tx = np.zeros(0, dtype=np.int8)
+        self.lat = np.zeros(0, dtype=np.float32)
+        self.lon = np.zeros(0, dtype=np.float32)
+        self.upsert(rows)
+
+    def encode(self, rows):
+        weights = np.array([w for _, _, w in FEATURES])
+        scaled = (self.raw_features(rows) - self.center) / self.scale * weights
+        # 값이 없으면 중앙값(0) 으로
+        scaled = np.nan_to_num(scaled)
+
+        lat = np.array([np.nan if r["latitude"] is None else r["latitude"] for r in rows], dtype=np.float64)
+        lon = np.array([np.nan if r["longitude"] is None else r["longitude"] for r in rows], dtype=np.float64)
+        km_lat = (lat - self.origin[0]) * KM_PER_DEG_LAT
+        km_lon = (lon - self.origin[1]) * KM_PER_DEG_LAT * np.cos(np.radians(self.origin[0]))
+        location = np.nan_to_num(np.stack([km_lat, km_lon], axis=1) / LOCATION_SCALE_KM)
+
+        option_bit = {option: i for i, option in enumerate(self.vocab)}
+        bits = np.zeros(len(rows), dtype=np.uint64)
+        tx = np.zeros(len(rows), dtype=np.int8)
+        for i, row in enumerate(rows):
+            mask = 0
+            for option in split_options(row["additional_options"]):
+                if option in option_bit:
+                    mask |= 1 << option_bit[option]
+                elif len(self.vocab) < MAX_OPTIONS:
+                    # 사전에 빈 자리가 있으면 새 옵션도 바로 추가
+                    option_bit[option] = len(self.vocab)
+                    self.vocab.append(option)
+                    mask |= 1 << option_bit[option]
+            bits[i] = mask
+            tx_type = row["transaction_type"] or ""
+            if tx_type not in self.tx_types:
+                self.tx_types.append(tx_type)
+            tx[i] = self.tx_types.index(tx_type)
+
+        matrix = np.hstack([scaled, location]).astype(np.float32)
+        return matrix, bits, tx, lat.astype(np.float32), lon.astype(np.float32)
+
+    def upsert(self, rows):
+        """바뀐 행은 덮어쓰고 새 행은 추가 (id 정렬 유지)"""
+        if not rows:
+            return
+        new_ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        matrix, bits, tx, lat, lon = self.encode(rows)
+
+        keep = ~np.isin(self.ids, new_ids)
+        ids = np.concatenate([self.ids[keep], new_ids])
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.matrix = np.vstack([self.matrix[keep], matrix])[order]
+        self.bits = np.concatenate([self.bits[keep], bits])[order]
+        self.tx = np.concatenate([self.tx[keep], tx])[order]
+        self.lat = np.concatenate([self.lat[keep], lat])[order]
+        self.lon = np.concatenate([self.lon[keep], lon])[order]
+        self._norms = None
+
+    def remove(self, room_ids):
+        keep = ~np.isin(self.ids, np.asarray(room_ids, dtype=np.int64))
+        for name in ("ids", "matrix", "bits", "tx", "lat", "lon"):
+            setattr(self, name, getattr(self, name)[keep])
+        self._norms = None
+
+    # --- 검색 ---
+
+    def norms(self):
+        """행별 |x|² (upsert/remove 후 처음 검색할 때 다시 계산)"""
+        if self._norms is None or len(self._norms) != len(self.ids):
+            self._norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        return self._norms
+
+    def position(self, room_id):
+        i = np.searchsorted(self.ids, room_id)
+        if i < len(self.ids) and self.ids[i] == room_id:
+            return i
+        return None
+
+    def option_distance(self, rows, i):
+        """자카드 거리 (옵션이 둘 다 없으면 0)"""
+        union = popcount64(self.bits[rows] | self.bits[i])
+        inter = popcount64(self.bits[rows] & self.bits[i])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return OPTION_WEIGHT * np.where(union > 0, 1 - inter / union, 0.0)
+
+    def top_k(self, room_id, k=10, radius_km=None, shortlist=64):
+        """
+        [(room_id, 거리)] — 자기 자신 제외, 같은 거래방식끼리
+        숫자 특징 거리로 후보 shortlist 개를 먼저 고르고 옵션 거리를 더해서 다시 정렬
+        (옵션 거리는 0~OPTION_WEIGHT 라 shortlist 밖이 더 가까울 수 없을 때만 끝내고, 아니면 범위를 넓힌다)
+        """
+        i = self.position(room_id)
+        if i is None:
+            return None
+
+        if radius_km:
+            dlat = radius_km / KM_PER_DEG_LAT
+            dlon = dlat / max(np.cos(np.radians(self.lat[i])), 0.01)
+            box = (np.abs(self.lat - self.lat[i]) <= dlat) & (np.abs(self.lon - self.lon[i]) <= dlon) & (self.tx == self.tx[i])
+            box[i] = False
+            rows = np.flatnonzero(box)
+            diff = self.matrix[rows] - self.matrix[i]
+            dist = np.einsum("ij,ij->i", diff, diff)
+        else:
+            # 후보를 모아서 복사하는 것보다 전체를 한 번에 계산하고 다른 거래방식을 inf 로 지우는 게 빠르다
+            # |x - q|² = |x|² - 2x·q + |q|² (행렬-벡터 곱 한 번)
+            rows = None
+            q = self.matrix[i]
+            dist = np.maximum(self.norms() - 2 * (self.matrix @ q) + q @ q, 0)
+            other = self.tx != self.tx[i]
+            dist[other] = np.inf
+            dist[i] = np.inf
+
+        n = len(dist) - int(np.count_nonzero(other)) - 1 if rows is None else len(rows)
+        if n == 0:
+            return []
+        k = min(k, n)
+
+        m = min(max(shortlist, k * 4), n)
+        while True:
+            short = np.argpartition(dist, m - 1)[:m] if m < len(dist) else np.arange(len(dist))
+            short = short[np.isfinite(dist[short])]
+            total = dist[short] + self.option_distance(short if rows is None else rows[short], i)
+            top = np.argpartition(total, k - 1)[:k]
+            # shortlist 밖 후보의 숫자 거리 ≥ shortlist 안 최댓값
+            if m >= n or dist[short].max() >= total[top].max():
+                break
+            m = min(m * 4, n)
+
+        top = top[np.argsort(total[top])]
+        picked = short[top] if rows is None else rows[short[top]]
+        return [(int(self.ids[j]), float(np.sqrt(total[t]))) for j, t in zip(picked, top)]
+
+    # --- 저장/불러오기 ---
+
+    def save(self, path=INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, ids=self.ids, matrix=self.matrix, bits=self.bits, tx=self.tx, lat=self.lat, lon=self.lon,
+                 center=self.center, scale=self.scale, origin=self.origin,
+                 vocab=np.array(self.vocab, dtype=str), tx_types=np.array(self.tx_types, dtype=str))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        index = cls()
+        with np.load(path) as data:
+            for name in ("ids", "matrix", "bits", "tx", "lat", "lon", "center", "scale", "origin"):
+                setattr(index, name, data[name])
+            index.vocab = [str(v) for v in data["vocab"]]
+            index.tx_types = [str(v) for v in data["tx_types"]]
+        index.mtime = os.path.getmtime(path)
+        return index
+
+
+def update_similar_index(db_config, room_ids=None, path=INDEX_PATH, full_rebuild_ratio=0.2):
+    """
+    적재 후 호출: 인덱스가 없거나 바뀐 행이 많으면 전체 재빌드, 아니면 room_ids 만 갱신
+    """
+    if os.path.exists(path) and room_ids is not None:
+        index = SimilarIndex.load(path)
+        if len(index) and len(room_ids) <= len(index) * full_rebuild_ratio:
+            rows = read_rooms(db_config, room_ids)
+            index.upsert(rows)
+            missing = set(room_ids) - {r["id"] for r in rows}
+            if missing:
+                index.remove(list(missing))
+            index.save(path)
+            print(f"✅ 유사 매물 인덱스 갱신: {len(rows)}건 (전체 {len(index)}건)")
+            return index
+
+    index = SimilarIndex()
+    index.fit(read_rooms(db_config))
+    index.save(path)
+    print(f"✅ 유사 매물 인덱스 재빌드: {len(index)}건")
+    return index
+
+
+if __name__ == "__main__":
+    update_similar_index({
+        'host': 'localhost',
+        'port': 3310,
+        'user': 'root',
+        'password': '1234',
+        'database': 'bangu'
+    })
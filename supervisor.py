@@ -0,0 +1,270 @@
+"""
+상세 수집 워커 감독 프로세스
+- peterdb.run_worker 를 N개 프로세스로 띄우고 target_urls 의 처리할 차례인 pending 개수에 맞춰 늘리고 줄인다
+- 워커마다 CPU 코어 하나에 고정 + nice, 메모리(RSS, 브라우저 자식 포함)가 한도를 넘으면 재시작
+- 워커마다 자기 프로세스 그룹을 만들어서 강제 종료할 때 브라우저 자식까지 그룹째 죽인다
+- 죽은 워커가 선점한 행은 pending 으로 반납하고 다시 띄운다
+- 축소/메모리 재시작은 stop_event 만 켜 두고 다음 점검 때 거둔다 (감독 루프는 기다리지 않는다)
+- Ctrl+C / SIGTERM 이면 워커들이 지금 행만 마치고 반납 후 종료
+
+예) python supervisor.py --min-workers 1 --max-workers 6 --max-rss-mb 1500
+"""
+import argparse, math, multiprocessing, os, signal, socket, time
+
+from peterdb import run_worker
+from scheduler import count_due_urls, release_claimed_urls
+
+
+def proc_tree_rss_mb(pid):
+    """pid 와 그 자식들(Chromium 포함)의 RSS 합계 (MB, /proc 기준)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # comm 에 공백/괄호가 있을 수 있어서 마지막 ')' 뒤부터 자른다
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+        stack.extend(children.get(current, []))
+    return total_kb / 1024
+
+
+def kill_process_group(pid):
+    """워커 프로세스 그룹(워커 + Playwright/Chromium 자식) 전체 SIGKILL"""
+    if not hasattr(os, 'killpg'):
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def worker_main(db_config, worker_id, cpu, nice, worker_args, stop_event):
+    """워커 프로세스 진입점"""
+    # 프로세스 그룹 id = 워커 pid 가 되도록 (브라우저 자식들도 이 그룹에 들어간다)
+    if hasattr(os, 'setpgid'):
+        os.setpgid(0, 0)
+    # Ctrl+C 는 감독 프로세스가 받아서 stop_event 로 전달한다
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    if nice:
+        os.nice(nice)
+
+    run_worker(db_config, worker_id, stop_event=stop_event, **worker_args)
+
+
+class Supervisor:
+    def __init__(self, db_config, min_workers=1, max_workers=None, urls_per_worker=20,
+                 max_rss_mb=1500, nice=5, poll_seconds=15, shutdown_timeout=120, worker_args=None):
+        self.db_config = db_config
+        self.min_workers = min_workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.urls_per_worker = urls_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.nice = nice
+        self.poll_seconds = poll_seconds
+        self.shutdown_timeout = shutdown_timeout
+        self.worker_args = worker_args or {}
+
+        self.host = socket.gethostname()
+        self.cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        self.workers = {}  # slot → (process, stop_event)
+        self.draining = {}  # slot → (강제 종료 시각, 끝나면 다시 띄울지)
+        self.stopping = False
+
+    def worker_id(self, slot):
+        return f"{self.host}-w{slot}"
+
+    def start_worker(self, slot):
+        stop_event = multiprocessing.Event()
+        cpu = self.cpus[slot % len(self.cpus)] if self.cpus else None
+        process = multiprocessing.Process(
+            target=worker_main,
+            args=(self.db_config, self.worker_id(slot), cpu, self.nice, self.worker_args, stop_event),
+            name=self.worker_id(slot),
+        )
+        process.start()
+        self.workers[slot] = (process, stop_event)
+        print(f"▶️ 워커 {self.worker_id(slot)} 시작 (pid={process.pid}, cpu={cpu})")
+
+    def stop_worker(self, slot):
+        """지금 행을 마칠 때까지 기다렸다가 반납 (시간 넘기면 강제 종료)"""
+        process, stop_event = self.workers[slot]
+        stop_event.set()
+        process.join(self.shutdown_timeout)
+        if process.is_alive():
+            self.force_kill(slot)
+        else:
+            # 워커는 끝났어도 브라우저 자식이 남아 있을 수 있다
+            kill_process_group(process.pid)
+        self.workers.pop(slot)
+        self.draining.pop(slot, None)
+        self.release(slot)
+
+    def drain(self, slot, restart=False):
+        """지금 행만 마치고 내려가라고 알리고 바로 돌아온다 (check_health 가 나중에 거둔다)"""
+        self.workers[slot][1].set()
+        self.draining[slot] = (time.monotonic() + self.shutdown_timeout, restart)
+
+    def force_kill(self, slot):
+        process, _ = self.workers[slot]
+        print(f"⚠️ 워커 {self.worker_id(slot)} 가 제때 끝나지 않아 강제 종료")
+        kill_process_group(process.pid)
+        # 아직 setpgid 전이라 그룹이 없었을 때를 대비
+        process.kill()
+        process.join()
+
+    def release(self, slot):
+        try:
+            released = release_claimed_urls(self.db_config, self.worker_id(slot))
+            if released:
+                print(f"↩️ 워커 {self.worker_id(slot)} 선점 {released}건 반납")
+        except Exception as e:
+            print(f"❌ 반납 실패 ({self.worker_id(slot)}): {e}")
+
+    def desired_workers(self):
+        """(원하는 워커 수, pending 개수) — 조회 실패하면 None"""
+        try:
+            pending = count_due_urls(self.db_config)
+        except Exception as e:
+            print(f"❌ pending 조회 실패: {e}")
+            return None
+        wanted = math.ceil(pending / self.urls_per_worker) if self.urls_per_worker else self.max_workers
+        return max(self.min_workers, min(self.max_workers, wanted)), pending
+
+    def check_health(self):
+        """죽었거나 메모리를 너무 먹는 워커 재시작"""
+        for slot in list(self.workers):
+            process, stop_event = self.workers[slot]
+            if stop_event.is_set() and process.is_alive():
+                # 내려가는 중인 워커: 시간을 넘겼으면 강제 종료, 아니면 다음 점검까지 둔다
+                deadline, _ = self.draining.get(slot, (0, False))
+                if time.monotonic() < deadline:
+                    continue
+                self.force_kill(slot)
+
+            if not process.is_alive():
+                if stop_event.is_set():
+                    # 축소/재시작 요청으로 내려간 워커 (남은 브라우저 자식 정리)
+                    kill_process_group(process.pid)
+                    self.workers.pop(slot)
+                    _, restart = self.draining.pop(slot, (0, False))
+                    self.release(slot)
+                    if restart and not self.stopping:
+                        self.start_worker(slot)
+                    continue
+                print(f"💥 워커 {self.worker_id(slot)} 비정상 종료 (exitcode={process.exitcode}) → 재시작")
+                kill_process_group(process.pid)
+                self.workers.pop(slot)
+                self.release(slot)
+                self.start_worker(slot)
+                continue
+
+            rss = proc_tree_rss_mb(process.pid)
+            if self.max_rss_mb and rss > self.max_rss_mb:
+                print(f"🧯 워커 {self.worker_id(slot)} 메모리 {rss:.0f}MB > {self.max_rss_mb}MB → 재시작")
+                self.drain(slot, restart=True)
+
+    def scale(self):
+        result = self.desired_workers()
+        if result is None:
+            return
+        wanted, pending = result
+
+        # 메모리 때문에 재시작 대기 중인 워커도 곧 다시 뜨니 돌고 있는 것으로 센다
+        running = sorted(slot for slot, (_, ev) in self.workers.items()
+                         if not ev.is_set() or self.draining.get(slot, (0, False))[1])
+        if len(running) < wanted:
+            free = [slot for slot in range(self.max_workers) if slot not in self.workers]
+            for slot in free[:wanted - len(running)]:
+                self.start_worker(slot)
+            print(f"📈 pending {pending}건 → 워커 {wanted}개")
+        elif len(running) > wanted:
+            # 번호가 큰 워커부터 지금 행만 마치고 내려가게 한다
+            for slot in running[wanted:]:
+                self.drain(slot)
+            print(f"📉 pending {pending}건 → 워커 {wanted}개")
+
+    def handle_signal(self, signum, frame):
+        print(f"\n🛑 종료 신호({signum}) 수신 → 워커 정리 중...")
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.handle_signal)
+        signal.signal(signal.SIGTERM, self.handle_signal)
+
+        print(f"=== 감독 시작: 워커 {self.min_workers}~{self.max_workers}개 ===")
+        try:
+            while not self.stopping:
+                self.check_health()
+                self.scale()
+                deadline = time.monotonic() + self.poll_seconds
+                while not self.stopping and time.monotonic() < deadline:
+                    time.sleep(0.5)
+        finally:
+            for _, stop_event in self.workers.values():
+                stop_event.set()
+            for slot in list(self.workers):
+                self.stop_worker(slot)
+            print("✅ 모든 워커 종료")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상세 수집 워커 감독")
+    parser.add_argument("--min-workers", type=int, default=1)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--urls-per-worker", type=int, default=20, help="pending 몇 건당 워커 하나")
+    parser.add_argument("--max-rss-mb", type=int, default=1500, help="워커(브라우저 포함) 메모리 한도, 0이면 무제한")
+    parser.add_argument("--nice", type=int, default=5)
+    parser.add_argument("--poll-seconds", type=float, default=15)
+    parser.add_argument("--batch-size", type=int, default=5, help="워커가 한 번에 선점하는 URL 수")
+    parser.add_argument("--delay", type=float, default=20, help="매물 사이 대기 (초)")
+    parser.add_argument("--base-dir", default="scraped_data")
+    args = parser.parse_args()
+
+    # DB 연결 설정
+    db_config = {
+        'host': 'localhost',
+        'port': 3310,
+        'user': 'root',
+        'password': '1234',
+        'database': 'bangu'
+    }
+
+    Supervisor(
+        db_config,
+        min_workers=args.min_workers,
+        max_workers=args.max_workers,
+        urls_per_worker=args.urls_per_worker,
+        max_rss_mb=args.max_rss_mb,
+        nice=args.nice,
+        poll_seconds=args.poll_seconds,
+        worker_args={
+            'base_dir': args.base_dir,
+            'batch_size': args.batch_size,
+            'delay': args.delay,
+        },
+    ).run()
+
+
+if __name__ == "__main__":
+    main()